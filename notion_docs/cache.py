@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the meaning of the stored hashes changes; older files are then ignored
+CACHE_VERSION = 3
+
+# Breadcrumb -> (page_id, text_hash, subtree_hash) as last written to Notion
+PageCache = Dict[Tuple[str, ...], Tuple[str, str, str]]
+
+
+def load_cache(path: str, root_page_id: str) -> PageCache:
+    """Load the local copy of page metadata written by a previous sync.
+
+    A missing, unreadable or outdated file, or one written for another root page,
+    yields an empty cache: every page is then checked against Notion again.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable metadata cache %s: %s", path, e)
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION or data.get("root_page_id") != root_page_id:
+        logger.info("Ignoring metadata cache %s written for another version or root page", path)
+        return {}
+    cache: PageCache = {}
+    for entry in data.get("pages", []):
+        cache[tuple(entry["crumb"])] = (entry["page_id"], entry["text_hash"], entry["subtree_hash"])
+    return cache
+
+
+def save_cache(path: str, root_page_id: str, cache: PageCache) -> None:
+    """Write the cache next to its final location first, so a crash never leaves a partial file."""
+    data = {
+        "version": CACHE_VERSION,
+        "root_page_id": root_page_id,
+        "pages": [
+            {"crumb": list(crumb), "page_id": page_id, "text_hash": text_hash, "subtree_hash": subtree_hash}
+            for crumb, (page_id, text_hash, subtree_hash) in sorted(cache.items())
+        ],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
@@ -1,29 +1,71 @@
 import json
 import logging
-from dataclasses import asdict
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Iterable, List
 
-from .files import iter_source_files, extract_block_comments_from_file, SUPPORTED_EXTENSIONS
+from .files import iter_source_files, extract_block_comments_from_file, read_source_file, SUPPORTED_EXTENSIONS
 from .models import BlockComment
 
 logger = logging.getLogger(__name__)
 
+# Below this many files the process pool start-up cost outweighs parallel lexing
+PARALLEL_MIN_FILES = 32
+# Opt-in read/parse pipeline: file reads run on a thread pool, overlapping with parsing
+PIPELINE_ENV = "NOTION_DOCS_PIPELINE"
+PIPELINE_READERS = 8
+PIPELINE_BATCH = 64
+
+
+def _run_pipeline(paths: List[str], workers: int) -> List[BlockComment]:
+    results: List[BlockComment] = []
+    pending: List[Future] = []
+    with ThreadPoolExecutor(max_workers=PIPELINE_READERS) as readers, ProcessPoolExecutor(max_workers=workers) as ex:
+        # Read one bounded batch at a time; parsing of earlier batches keeps running meanwhile
+        for start in range(0, len(paths), PIPELINE_BATCH):
+            batch = paths[start:start + PIPELINE_BATCH]
+            for path, text in zip(batch, readers.map(read_source_file, batch)):
+                pending.append(ex.submit(extract_block_comments_from_file, path, text))
+        for fut in pending:
+            results.extend(fut.result())
+    return results
+
 
 def run(root: str, exts: Iterable[str]) -> List[BlockComment]:
     logger.info("Started analyzing files in '%s'", root)
+    suffixes = tuple(e if e.startswith('.') else f'.{e}' for e in exts)
+    paths = [path for path in iter_source_files(root) if path.endswith(suffixes)]
     results: List[BlockComment] = []
-    file_count = 0
-    for path in iter_source_files(root):
-        if any(path.endswith(e if e.startswith('.') else f'.{e}') for e in exts):
-            file_count += 1
+    if len(paths) < PARALLEL_MIN_FILES:
+        for path in paths:
             results.extend(extract_block_comments_from_file(path))
-    logger.info("Finished analyzing %d files, found %d comments", file_count, len(results))
+    else:
+        workers = os.cpu_count() or 1
+        logger.debug("Analyzing %d files with %d worker processes", len(paths), workers)
+        if os.environ.get(PIPELINE_ENV) == "1":
+            results = _run_pipeline(paths, workers)
+        else:
+            chunksize = max(1, len(paths) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for comments in ex.map(extract_block_comments_from_file, paths, chunksize=chunksize):
+                    results.extend(comments)
+    logger.info("Finished analyzing %d files, found %d comments", len(paths), len(results))
     return results
 
 
 def print_results(results: Iterable[BlockComment], as_json: bool) -> None:
     if as_json:
-        print(json.dumps([asdict(r) for r in results], ensure_ascii=False, indent=2))
+        # Stream one record at a time; output matches json.dumps(list, indent=2)
+        enc = json.JSONEncoder(ensure_ascii=False, indent=2)
+        out = sys.stdout
+        first = True
+        for r in results:
+            out.write("[\n  " if first else ",\n  ")
+            first = False
+            for chunk in enc.iterencode(r.to_dict()):
+                out.write(chunk.replace("\n", "\n  "))
+        out.write("[]\n" if first else "\n]\n")
         return
     for r in results:
         print(f"{r.file_path}")
@@ -31,5 +73,3 @@ def print_results(results: Iterable[BlockComment], as_json: bool) -> None:
         print("/*")
         print(r.text)
         print("*/\n")
-
-
@@ -1,161 +1,268 @@
 import re
-from typing import Dict, List, Optional, Tuple
+import sys
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from pygments import lex
-from pygments.lexers import JavaLexer, KotlinLexer, PhpLexer
+from pygments.lexers import PhpLexer
 from pygments.token import Token
 
 
+_RE_OPEN = re.compile(r"^/\*+ ?")
+_RE_CLOSE = re.compile(r" ?\*+/\s*$")
+_RE_STARS = re.compile(r"/\*+")
+_RE_ENDSTARS = re.compile(r"\*+/")
 
+_BREADCRUMB_PREFIXES = ("NOTION.", "NOTION/", "NOTION[")
+# Tag options in brackets, e.g. NOTION[include_all].Page
+_RE_OPTIONS = re.compile(r"NOTION\[([^\]]*)\]")
+
+# Next token that changes the scanner state in C-family sources
+_RE_SCAN = re.compile(r'/\*|//|"""|"|\'|`')
+# Remainder of a double-quoted string literal (stops at an unterminated line end)
+_RE_STRING = re.compile(r'(?:[^"\\\n]|\\.)*"?')
+_RE_CHAR = re.compile(r"'(?:\\u[0-9a-fA-F]{4}|\\.|[^\\\n])'")
+# Kotlin backtick identifier, e.g. `test /* not a comment */`; it cannot span lines
+_RE_BACKTICK = re.compile(r"`[^`\n]*`")
+
+# Languages that still go through a full Pygments lexer. PHP is kept here because
+# source files may interleave inline HTML with code. Lexers are stateless across
+# lex() calls, so one shared instance per language is enough.
+_LEXERS = {
+    "php": PhpLexer(),
+}
+
+
+def _replace_opening(m: re.Match) -> str:
+    token = m.group(0)
+    # Replace only the '/**' or '/*' part with spaces; keep any following space intact
+    stars = _RE_STARS.match(token)
+    if not stars:
+        return token
+    return " " * len(stars.group(0)) + token[len(stars.group(0)) :]
+
+
+def _replace_closing(m: re.Match) -> str:
+    token = m.group(0)
+    # Replace only the '*/' part (with leading *s) with spaces; keep preceding spaces intact
+    stars = _RE_ENDSTARS.search(token)
+    if not stars:
+        return token
+    start, end = stars.span()
+    return token[:start] + (" " * (end - start)) + token[end:]
+
+
+def _leading_ws(s: str) -> str:
+    # Leading run of spaces/tabs
+    return s[: len(s) - len(s.lstrip(" \t"))]
+
+
+def _is_star_line(l: str) -> bool:
+    # Consider lines that start with '*' optionally preceded by whitespace
+    return l.lstrip(" \t").startswith("*")
+
+
+def _strip_star_prefix(l: str) -> str:
+    # Strip any leading whitespace, then '*', then optionally one space
+    rest = l.lstrip(" \t")
+    if not rest.startswith("*"):
+        return l
+    return rest[2:] if rest[1:2] == " " else rest[1:]
+
+
+def _is_breadcrumb_line(l: str) -> bool:
+    return l.lstrip().startswith(_BREADCRUMB_PREFIXES)
+
+
+def _common_prefix(prefixes: List[str]) -> str:
+    # The lexicographic min and max bound the common prefix of the whole group
+    lo = min(prefixes)
+    hi = max(prefixes)
+    i = 0
+    while i < len(lo) and lo[i] == hi[i]:
+        i += 1
+    return lo[:i]
+
+
+def _is_blank(l: str) -> bool:
+    return not l or l.isspace()
+
+
+def _trim_common_indent(ls: List[str], blank: List[bool]) -> List[str]:
+    # Compute common leading whitespace among non-empty lines and trim it
+    prefixes = [_leading_ws(l) for l, b in zip(ls, blank) if not b]
+    if not prefixes:
+        return ls
+    common = _common_prefix(prefixes)
+    if not common:
+        return ls
+    return [l[len(common):] if l.startswith(common) else l for l in ls]
+
+
+def _normalize_single_line(line: str) -> str:
+    # Single-line comments have no indentation or alignment to reconcile
+    line = line.lstrip(" \t")
+    if line.startswith("*"):
+        line = _strip_star_prefix(line).lstrip(" \t")
+    return line.rstrip()
+
+
+# Pure function of the raw comment; identical banners and license headers repeat across files
+@lru_cache(maxsize=8192)
 def _normalize_block_comment_text(raw: str) -> str:
     # Replace opening and closing block comment delimiters with same-length spaces,
     # preserving surrounding spaces. Do not trim inner content yet.
-    def replace_opening(m: re.Match) -> str:
-        token = m.group(0)
-        # Replace only the '/**' or '/*' part with spaces; keep any following space intact
-        stars = re.match(r"/\*+", token)
-        if not stars:
-            return token
-        return " " * len(stars.group(0)) + token[len(stars.group(0)) :]
-
-    def replace_closing(m: re.Match) -> str:
-        token = m.group(0)
-        # Replace only the '*/' part (with leading *s) with spaces; keep preceding spaces intact
-        stars = re.search(r"\*+/", token)
-        if not stars:
-            return token
-        start, end = stars.span()
-        return token[:start] + (" " * (end - start)) + token[end:]
-
     # Apply only at the very start and very end of the comment token
-    s = re.sub(r"^/\*+ ?", replace_opening, raw)
-    s = re.sub(r" ?\*+/\s*$", replace_closing, s)
+    s = _RE_OPEN.sub(_replace_opening, raw, count=1)
+    s = _RE_CLOSE.sub(_replace_closing, s, count=1)
 
     lines = s.splitlines()
+    if len(lines) == 1:
+        return _normalize_single_line(lines[0])
 
-    # Remove leading/trailing completely empty lines
-    while lines and lines[0].strip() == "":
-        lines.pop(0)
-    while lines and lines[-1].strip() == "":
-        lines.pop()
+    # Single pass over the raw lines: locate the first/last non-empty line and record,
+    # for every non-empty line, its leading whitespace and whether it starts with '*'.
+    first_ne = -1
+    last_ne = -1
+    prefixes: List[str] = []
+    star_flags: List[bool] = []
+    blank = [_is_blank(l) for l in lines]
+    # Unindented remainder of every line (None for blank ones), reused when stripping stars
+    rests: List[Optional[str]] = [None] * len(lines)
+    for idx, l in enumerate(lines):
+        if blank[idx]:
+            continue
+        if first_ne < 0:
+            first_ne = idx
+        last_ne = idx
+        rest = rests[idx] = l.lstrip(" \t")
+        prefixes.append(l[: len(l) - len(rest)])
+        star_flags.append(rest.startswith("*"))
 
-    if not lines:
+    if first_ne < 0:
         return ""
 
-    def trim_common_indent(ls: List[str]) -> List[str]:
-        # Compute common leading whitespace among non-empty lines and trim it
-        non_empty = [l for l in ls if l.strip() != ""]
-        if not non_empty:
-            return ls
-        prefixes = []
-        for l in non_empty:
-            m = re.match(r"^[\t ]*", l)
-            prefixes.append(m.group(0) if m else "")
-        common = prefixes[0]
-        for ws in prefixes[1:]:
-            while not ws.startswith(common) and common:
-                common = common[:-1]
-        if not common:
-            return ls
-        return [l[len(common):] if l.startswith(common) else l for l in ls]
-
-    # First: trim maximum common indentation
-    lines = trim_common_indent(lines)
+    # Remove leading/trailing completely empty lines
+    lines = lines[first_ne:last_ne + 1]
+    blank = blank[first_ne:last_ne + 1]
+    rests = rests[first_ne:last_ne + 1]
 
     # Star-strip if all non-empty lines start with '*', or if all lines EXCEPT the first non-empty start with '*'.
     # This ignores the first line which may contain the opening '/*' content on the same line.
-    non_empty_lines = [l for l in lines if l.strip() != ""]
-
-    def is_star_line(l: str) -> bool:
-        # Consider lines that start with '*' optionally preceded by whitespace
-        return bool(re.match(r"^[ \t]*\*", l))
-
-    def is_breadcrumb_line(l: str) -> bool:
-        ls = l.lstrip()
-        return ls.startswith("NOTION.") or ls.startswith("NOTION/") or ls.startswith("NOTION[")
-
-    should_star_strip = False
-    if non_empty_lines:
-        # Case 1: every non-empty line starts with '*'
-        if all(is_star_line(l) for l in non_empty_lines):
-            should_star_strip = True
-        else:
-            # Case 2: ignore the first non-empty line when checking (it may start with '/')
-            tail = non_empty_lines[1:]
-            if tail and all(is_star_line(l) for l in tail):
-                should_star_strip = True
-            # Preserve breadcrumb-first special case as well
-            elif is_breadcrumb_line(non_empty_lines[0]) and all(is_star_line(l) for l in non_empty_lines[1:]):
-                should_star_strip = True
+    # Case 2 requires at least one tail line, unless the first line is a breadcrumb.
+    tail_all_star = all(islice(star_flags, 1, None))
+    all_star = star_flags[0] and tail_all_star
+    should_star_strip = all_star or (
+        tail_all_star and (len(star_flags) > 1 or _is_breadcrumb_line(lines[0]))
+    )
 
+    # Trim maximum common indentation (and the star prefix when applicable) in one pass.
+    # For the common Javadoc shape every non-empty line is a star line, and star stripping
+    # already drops the indentation, so the common prefix is not needed.
+    common = "" if all_star else _common_prefix(prefixes)
+    n = len(common)
     if should_star_strip:
-        new_lines: List[str] = []
-        for l in lines:
-            # Strip any leading whitespace, then '*', then optionally one space
-            m = re.match(r'^[ \t]*\*( ?)', l)
-            if m:
-                # Remove the matched part (whitespace + * + optional space)
-                l = l[len(m.group(0)):]
-            new_lines.append(l)
-        lines = new_lines
-        lines = trim_common_indent(lines)
-
-    # Remove leading/trailing completely empty lines again
-    while lines and lines[0].strip() == "":
-        lines.pop(0)
-    while lines and lines[-1].strip() == "":
-        lines.pop()
+        if all_star:
+            # Every non-empty line is "<indent>*...": strip the star from the remainder computed above
+            lines = [l if r is None else (r[2:] if r[1:2] == " " else r[1:]) for l, r in zip(lines, rests)]
+        else:
+            lines = [_strip_star_prefix(l[n:] if n and l.startswith(common) else l) for l in lines]
+        # Bare '*' lines become empty once stripped, so refresh the flags and trim again
+        blank = [_is_blank(l) for l in lines]
+        if all(blank):
+            return ""
+        first_ne = blank.index(False)
+        last_ne = len(blank) - 1 - blank[::-1].index(False)
+        lines = _trim_common_indent(lines[first_ne:last_ne + 1], blank[first_ne:last_ne + 1])
+        blank = blank[first_ne:last_ne + 1]
+    elif n:
+        lines = [l[n:] if l.startswith(common) else l for l in lines]
 
     # Ensure breadcrumb line is not indented: strip leading spaces/tabs if first line is NOTION.*
-    if lines and re.match(r"^\s*NOTION[\.\[/]", lines[0]):
+    if _is_breadcrumb_line(lines[0]):
         lines[0] = lines[0].lstrip(" \t")
         # If subsequent lines are visually aligned with the breadcrumb due to extra indentation,
         # remove their common leading whitespace equally.
-        tail_non_empty = [l for l in lines[1:] if l.strip() != ""]
-        if tail_non_empty:
-            # Compute common leading whitespace among tail non-empty lines
-            def leading_ws(s: str) -> str:
-                m = re.match(r"^[\t ]*", s)
-                return m.group(0) if m else ""
-            common_ws = leading_ws(tail_non_empty[0])
-            for t in tail_non_empty[1:]:
-                ws = leading_ws(t)
-                # Reduce common prefix to the shared part
-                while not ws.startswith(common_ws) and common_ws:
-                    common_ws = common_ws[:-1]
-            if common_ws:
-                new_tail: List[str] = []
-                for l in lines[1:]:
-                    if l.startswith(common_ws):
-                        new_tail.append(l[len(common_ws):])
-                    else:
-                        new_tail.append(l)
-                lines = [lines[0]] + new_tail
-
-    lines = [l if l.strip() else "" for l in lines]
-    return "\n".join(lines).rstrip()
-
-
-def extract_block_comments_from_text(text: str, lang: str) -> List[str]:
+        # Compute common leading whitespace among tail non-empty lines
+        tail_prefixes = [_leading_ws(l) for l, b in zip(islice(lines, 1, None), islice(blank, 1, None)) if not b]
+        common_ws = _common_prefix(tail_prefixes) if tail_prefixes else ""
+        if common_ws:
+            n = len(common_ws)
+            for i in range(1, len(lines)):
+                if lines[i].startswith(common_ws):
+                    lines[i] = lines[i][n:]
+
+    return "\n".join("" if b else l for l, b in zip(lines, blank)).rstrip()
+
+
+def _scan_block_comments(text: str) -> Iterator[str]:
+    """Yield raw /* ... */ comments from C-family source code.
+
+    String literals, char literals, Kotlin backtick identifiers and line comments are
+    skipped so that comment markers inside them are ignored. Unterminated block comments are not reported.
+    """
+    pos = 0
+    while True:
+        m = _RE_SCAN.search(text, pos)
+        if not m:
+            return
+        token = m.group(0)
+        if token == "/*":
+            end = text.find("*/", m.end())
+            if end == -1:
+                return
+            pos = end + 2
+            yield text[m.start():pos]
+        elif token == "//":
+            pos = text.find("\n", m.end())
+            if pos == -1:
+                return
+        elif token == '"""':
+            end = text.find('"""', m.end())
+            if end == -1:
+                return
+            pos = end + 3
+        elif token == '"':
+            string = _RE_STRING.match(text, m.end())
+            pos = string.end() if string else m.end()
+        elif token == "`":
+            name = _RE_BACKTICK.match(text, m.start())
+            pos = name.end() if name else m.end()
+        else:
+            char = _RE_CHAR.match(text, m.start())
+            pos = char.end() if char else m.end()
+
+
+def _lex_block_comments(text: str, lexer) -> Iterator[str]:
+    multiline = Token.Comment.Multiline
+    for tok_type, tok_val in lex(text, lexer):
+        # Token types are singletons, so identity is enough
+        if tok_type is multiline:
+            yield tok_val
+
+
+def extract_block_comments_from_text(text: str, lang: str, only_notion: bool = False) -> Iterator[str]:
+    """Yield the normalized bodies of all block comments in `text`.
+
+    With `only_notion`, comments that cannot carry a NOTION tag are dropped before
+    normalization. Callers relying on untagged comments (include_all) must keep the default.
+    """
+    if only_notion and "NOTION" not in text:
+        return
     if lang == "markdown":
-        return [text.strip("\n")]
-    elif lang == "java":
-        lexer = JavaLexer()
-    elif lang == "kotlin":
-        lexer = KotlinLexer()
-    elif lang == "php":
-        lexer = PhpLexer()
+        yield text.strip("\n")
+        return
+    lexer = _LEXERS.get(lang)
+    if lexer is None:
+        # Java, Kotlin and unknown languages (C-style comments) use the dedicated scanner
+        raw_comments = _scan_block_comments(text)
     else:
-        # Default to Kotlin-style (C-style comments) if unknown
-        lexer = KotlinLexer()
-    bodies: List[str] = []
-    line = 1
-    for tok_type, tok_val in lex(text, lexer):
-        if tok_type in (Token.Comment.Multiline,):
-            body = _normalize_block_comment_text(tok_val)
-            bodies.append(body)
-        line += tok_val.count("\n")
-    return bodies
+        raw_comments = _lex_block_comments(text, lexer)
+    for c in raw_comments:
+        if only_notion and "NOTION" not in c:
+            continue
+        yield _normalize_block_comment_text(c)
 
 
 def parse_breadcrumb_and_strip(body: str) -> Optional[Tuple[List[str], str, Dict[str, bool]]]:
@@ -169,19 +276,13 @@ def parse_breadcrumb_and_strip(body: str) -> Optional[Tuple[List[str], str, Dict
     """
     # Extract options from brackets if present (e.g., NOTION[include_all].page)
     options: Dict[str, bool] = {}
-    if body.startswith("NOTION["):
-        # Find the closing bracket
-        closing_bracket = body.find("]")
-        if closing_bracket != -1:
-            # Extract options from within brackets
-            options_str = body[len("NOTION["):closing_bracket]
-            # Parse comma-separated options
-            for opt in options_str.split(","):
-                opt = opt.strip()
-                if opt:
-                    options[opt] = True
-            # Remove the bracket part from body
-            body = "NOTION" + body[closing_bracket + 1:]
+    # Most tags carry no options; only enter the regex engine when a bracket follows the prefix
+    m = _RE_OPTIONS.match(body) if body.startswith("NOTION[") else None
+    if m:
+        # Parse comma-separated options
+        options = dict.fromkeys(filter(None, map(str.strip, m.group(1).split(","))), True)
+        # Remove the bracket part from body
+        body = "NOTION" + body[m.end():]
 
     if not (body.startswith("NOTION.") or body.startswith("NOTION/")):
         return None
@@ -206,7 +307,8 @@ def parse_breadcrumb_and_strip(body: str) -> Optional[Tuple[List[str], str, Dict
         sep = "."
     segments_part = token[len("NOTION")+1:]
     # Split only on the detected separator; the other character is a literal in segments
-    segments = [p.strip() for p in segments_part.split(sep) if p.strip()] if segments_part else []
+    # Segments repeat across many comments; interning lets equal titles share one object
+    segments = [sys.intern(p) for p in map(str.strip, segments_part.split(sep)) if p] if segments_part else []
     # Special case: Check if this is NOTION.* or NOTION/* with text after
     # If so, only keep "*" as the segment and move the rest to comment text
     if segments_part.strip() == "*" or (segments_part.startswith("* ") or segments_part.startswith("*\t")):
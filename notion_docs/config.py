@@ -1,11 +1,16 @@
 import logging
-import logging
 import os
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
 import yaml
 
+# libyaml-backed loader when PyYAML was built with it; the pure-Python loader otherwise
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
 YAML_FILES = [
@@ -24,11 +29,36 @@ class AppConfig:
     include_file_in_header: bool = False
     quote_color: str = "default"
     inline_code_color: str = "default"
+    # Local file remembering page metadata between runs; None disables it
+    metadata_cache: Optional[str] = None
+
+
+# Parsed YAML per config path, keyed by (st_mtime_ns, st_size) so edits are picked up
+_YAML_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
 
 
 def _load_yaml(path: str) -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    # Open directly and stat the open handle; a missing file raises FileNotFoundError
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _YAML_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = yaml.load(f, Loader=_YamlLoader) or {}
+    _YAML_CACHE[path] = (key, data)
+    return data
+
+
+def _find_config(base: str) -> Tuple[Optional[str], Optional[Dict]]:
+    """Return (path, data) for the first known config name present in base."""
+    for name in YAML_FILES:
+        p = os.path.join(base, name)
+        try:
+            return p, _load_yaml(p)
+        except FileNotFoundError:
+            continue
+    return None, None
 
 
 def load_config(path_or_dir: Optional[str] = None) -> AppConfig:
@@ -46,13 +76,7 @@ def load_config(path_or_dir: Optional[str] = None) -> AppConfig:
         candidate = os.path.abspath(path_or_dir)
         if os.path.isdir(candidate):
             base = candidate
-            data = None
-            for name in YAML_FILES:
-                p = os.path.join(base, name)
-                if os.path.exists(p):
-                    data = _load_yaml(p)
-                    config_file_path = p
-                    break
+            config_file_path, data = _find_config(base)
             if data is None:
                 raise FileNotFoundError(
                     f"No config found in directory {base}. Create one of: {', '.join(YAML_FILES)}"
@@ -62,13 +86,7 @@ def load_config(path_or_dir: Optional[str] = None) -> AppConfig:
             data = _load_yaml(candidate)
     else:
         base = os.getcwd()
-        data = None
-        for name in YAML_FILES:
-            p = os.path.join(base, name)
-            if os.path.exists(p):
-                data = _load_yaml(p)
-                config_file_path = p
-                break
+        config_file_path, data = _find_config(base)
         if data is None:
             raise FileNotFoundError(
                 f"No config found. Create one of: {', '.join(YAML_FILES)}"
@@ -129,6 +147,14 @@ def load_config(path_or_dir: Optional[str] = None) -> AppConfig:
         logger.warning(f"Invalid inline_code_color '{inline_code_color}', using 'default'")
         inline_code_color = "default"
 
+    # Optional local metadata cache; relative paths are resolved like 'root'
+    metadata_cache = data.get("metadata_cache")
+    if metadata_cache is not None:
+        metadata_cache = str(metadata_cache).strip() or None
+    if metadata_cache and not os.path.isabs(metadata_cache):
+        base_dir = os.path.dirname(os.path.abspath(config_file_path)) if config_file_path else os.getcwd()
+        metadata_cache = os.path.normpath(os.path.join(base_dir, metadata_cache))
+
     return AppConfig(
         root=root,
         root_page_id=root_page_id,
@@ -138,6 +164,7 @@ def load_config(path_or_dir: Optional[str] = None) -> AppConfig:
         include_file_in_header=include_file_in_header,
         quote_color=quote_color,
         inline_code_color=inline_code_color,
+        metadata_cache=metadata_cache,
     )
 
 
@@ -2,7 +2,10 @@ import os
 import hashlib
 from typing import Iterator, List, Tuple, Dict, Set, Optional
 import re
+import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 from .models import BlockComment
 from .comments import extract_block_comments_from_text, parse_breadcrumb_and_strip
@@ -11,15 +14,45 @@ from .mnemonic import compute_mnemonic
 logger = logging.getLogger(__name__)
 
 SUPPORTED_EXTENSIONS = {".java", ".kt", ".kts", ".php", ".md"}
+# Same extensions as a suffix tuple, so names are matched with a single str.endswith call
+_EXT_SUFFIXES = tuple(sorted(SUPPORTED_EXTENSIONS))
+
+_RE_SORT_INDEX = re.compile(r"^(.*?)(?:#(\d+))$")
+
+# Below this many stale files the tree scan stays sequential; a pool is not worth starting
+PARALLEL_COLLECT_MIN_FILES = 16
+
+
+def _fingerprint(text: str) -> str:
+    # Change-detection fingerprint only (not persisted, not security relevant): BLAKE2b is
+    # cheaper than SHA-256 and 128 bits are plenty to tell comment revisions apart. It ships
+    # with hashlib; comment texts are short, so a SIMD hash such as BLAKE3 would mostly save
+    # per-call overhead and is not worth an extra binary dependency.
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def iter_source_files(root: str) -> Iterator[str]:
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames.sort()
-        for filename in sorted(filenames):
-            _, ext = os.path.splitext(filename)
-            if ext in SUPPORTED_EXTENSIONS:
-                yield os.path.join(dirpath, filename)
+    """Yield supported source files under root, in the same order as a sorted top-down os.walk.
+
+    Files of a directory come first (sorted by name), then each subdirectory (sorted by name).
+    Symlinked directories are not followed and unreadable directories are skipped.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    subdirs: List[str] = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+            continue
+        name = entry.name
+        # A bare dotfile such as ".md" has no extension for os.path.splitext, so it is skipped
+        if name.endswith(_EXT_SUFFIXES) and name not in SUPPORTED_EXTENSIONS and entry.is_file():
+            yield entry.path
+    for subdir in subdirs:
+        yield from iter_source_files(subdir)
 
 
 def ext_to_lang(ext: str) -> str:
@@ -41,9 +74,12 @@ def _strip_sort_index(breadcrumb: List[str]) -> Tuple[List[str], Optional[int]]:
     if not breadcrumb:
         return breadcrumb, None
     last = breadcrumb[-1]
-    m = re.match(r"^(.*?)(?:#(\d+))$", last)
+    if "#" not in last:
+        return breadcrumb, None
+    m = _RE_SORT_INDEX.match(last)
     if m:
-        base, num = m.group(1), m.group(2)
+        # Interned like the parsed segments, so equal titles stay one shared object
+        base, num = sys.intern(m.group(1)), m.group(2)
         cleaned = breadcrumb[:-1] + [base]
         try:
             return cleaned, int(num)
@@ -52,51 +88,216 @@ def _strip_sort_index(breadcrumb: List[str]) -> Tuple[List[str], Optional[int]]:
     return breadcrumb, None
 
 
-def extract_block_comments_from_file(path: str) -> List[BlockComment]:
+def read_source_file(path: str) -> str:
+    # Read the raw bytes once (unbuffered) and decode in memory, so the latin-1
+    # fallback for non UTF-8 files does not read the file a second time.
+    # latin-1 maps every byte, so the fallback cannot fail and keeps the text lossless.
+    with open(path, "rb", buffering=0) as f:
+        data = f.read()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            text = f.read()
+        text = data.decode("utf-8")
     except UnicodeDecodeError:
-        with open(path, "r", encoding="latin-1", errors="ignore") as f:
-            text = f.read()
+        text = data.decode("latin-1")
+    # Same newline translation as text-mode reads
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
-    _, ext = os.path.splitext(path)
-    lang = ext_to_lang(ext)
 
-    # Helper to collect NOTION breadcrumbs and text hashes from a single file (no subtree)
-    def _collect_from_file(p: str) -> List[tuple]:
-        try:
-            with open(p, "r", encoding="utf-8") as ff:
-                t = ff.read()
-        except UnicodeDecodeError:
-            with open(p, "r", encoding="latin-1", errors="ignore") as ff:
-                t = ff.read()
-        _, e = os.path.splitext(p)
-        l = ext_to_lang(e)
-        entries = []
-        prev_bc: Optional[Tuple[str, ...]] = None
-        for b in extract_block_comments_from_text(t, l):
-            parsed = parse_breadcrumb_and_strip(b)
-            if parsed is None:
+# Per-file NOTION entries, keyed by path and validated against (st_mtime_ns, st_size)
+_FILE_ENTRIES_CACHE: Dict[str, Tuple[Tuple[int, int], List[Tuple[Tuple[str, ...], str]]]] = {}
+# Per-directory tree index, validated against the (path, stat key) list of all files in the tree
+_TREE_CACHE: Dict[str, Tuple[Tuple[Tuple[str, Tuple[int, int]], ...], "_TreeIndex"]] = {}
+
+
+def _file_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _collect_from_file(p: str, key: Optional[Tuple[int, int]] = None) -> List[Tuple[Tuple[str, ...], str]]:
+    """Collect NOTION breadcrumbs and raw texts from a single file (no subtree).
+
+    Results are memoized until the file's mtime or size changes; callers must not mutate them.
+    """
+    if key is None:
+        key = _file_key(p)
+    cached = _FILE_ENTRIES_CACHE.get(p)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    t = read_source_file(p)
+    _, e = os.path.splitext(p)
+    l = ext_to_lang(e)
+    entries = []
+    prev_bc: Optional[Tuple[str, ...]] = None
+    for b in extract_block_comments_from_text(t, l, only_notion=True):
+        parsed = parse_breadcrumb_and_strip(b)
+        if parsed is None:
+            continue
+        bc, rem, opts = parsed
+        # Handle NOTION.* placeholder by replacing with previous breadcrumb in the same file
+        if list(bc) == ["*"]:
+            if prev_bc is None:
+                logger.error("Encountered NOTION.* with no previous tag in file %s; ignoring this comment", p)
                 continue
-            bc, rem, opts = parsed
-            # Handle NOTION.* placeholder by replacing with previous breadcrumb in the same file
-            if list(bc) == ["*"]:
-                if prev_bc is None:
-                    logger.error("Encountered NOTION.* with no previous tag in file %s; ignoring this comment", p)
-                    continue
-                bc = list(prev_bc)
-            # Normalize breadcrumb by stripping any trailing #<num> from the last segment
-            cleaned_bc, _ = _strip_sort_index(list(bc))
-            prev_bc = tuple(cleaned_bc)
-            # Return raw remaining text; aggregation and hashing will be done globally per crumb
-            entries.append((tuple(cleaned_bc), rem))
-        return entries
+            bc = list(prev_bc)
+        # Normalize breadcrumb by stripping any trailing #<num> from the last segment
+        cleaned_bc, _ = _strip_sort_index(list(bc))
+        prev_bc = tuple(cleaned_bc)
+        # Return raw remaining text; aggregation and hashing will be done globally per crumb
+        entries.append((tuple(cleaned_bc), rem))
+    _FILE_ENTRIES_CACHE[p] = (key, entries)
+    return entries
+
+
+def _is_potential_mnemonic(s: str) -> bool:
+    # Consider 3-char uppercase strings that equal their own mnemonic as mnemonic tokens
+    return len(s) == 3 and compute_mnemonic(s) == s.upper()
+
+
+class _TrieNode:
+    """Breadcrumb trie node holding the (crumb, hash) entries of all strict descendants, sorted by crumb."""
+
+    __slots__ = ("children", "descendants")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.descendants: List[Tuple[Tuple[str, ...], str]] = []
+
+
+@dataclass
+class _TreeIndex:
+    observed_titles: Set[str]
+    mnemo_to_titles: Dict[str, Set[str]]
+    combined_hash_by_crumb: Dict[Tuple[str, ...], str]
+    trie: Optional[_TrieNode] = None
+
+    def build_trie(self) -> _TrieNode:
+        root = _TrieNode()
+        # Insert in crumb order so every descendants list comes out sorted
+        for crumb, h in sorted(self.combined_hash_by_crumb.items()):
+            node = root
+            for seg in crumb:
+                node.descendants.append((crumb, h))
+                node = node.children.setdefault(seg, _TrieNode())
+        self.trie = root
+        return root
+
+    def descendant_hashes(self, crumb: Tuple[str, ...]) -> List[Tuple[Tuple[str, ...], str]]:
+        """Return (crumb, combined hash) of all strict descendants of crumb, sorted by crumb."""
+        node = self.trie if self.trie is not None else self.build_trie()
+        for seg in crumb:
+            nxt = node.children.get(seg)
+            if nxt is None:
+                return []
+            node = nxt
+        return node.descendants
+
+    def resolve_segment(self, seg: str) -> str:
+        # If seg is exactly a known non-mnemonic-looking title, keep as is
+        if seg in self.observed_titles and not _is_potential_mnemonic(seg):
+            return seg
+        # If looks like a 3-char mnemonic, try to resolve to a unique title
+        if len(seg) == 3:
+            m = seg.upper()
+            titles = self.mnemo_to_titles.get(m)
+            if titles and len(titles) == 1:
+                return next(iter(titles))
+        return seg
+
+    def resolve_crumb(self, crumb: Tuple[str, ...]) -> Tuple[str, ...]:
+        return tuple(self.resolve_segment(s) for s in crumb)
+
+
+def _tree_index(
+    base_dir: str,
+    path: Optional[str] = None,
+    own_entries: Optional[List[Tuple[Tuple[str, ...], str]]] = None,
+) -> _TreeIndex:
+    """Build (or reuse) the mnemonic map and combined per-crumb hashes for all files under base_dir.
+
+    `own_entries` are the already-parsed (breadcrumb, raw text) entries of `path`,
+    used instead of extracting that file a second time.
+    """
+    files = tuple((p, _file_key(p)) for p in iter_source_files(base_dir))
+    cached = _TREE_CACHE.get(base_dir)
+    if cached is not None and cached[0] == files:
+        return cached[1]
+
+    # Files whose cached entries are missing or stale are read and parsed on a thread pool
+    # first; the ordered merge below then only hits the cache
+    stale = [
+        (p, key) for p, key in files
+        if p != path and (_FILE_ENTRIES_CACHE.get(p) or (None,))[0] != key
+    ]
+    if len(stale) >= PARALLEL_COLLECT_MIN_FILES:
+        workers = min(32, (os.cpu_count() or 4) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(_collect_from_file, [p for p, _ in stale], [key for _, key in stale]))
+
+    # First collect all raw crumbs/texts from the tree, noting every title (segment string)
+    # on the way so the mnemonic map can be built without another pass over the entries
+    raw_global_entries: List[Tuple[Tuple[str, ...], str]] = []
+    observed_titles: Set[str] = set()
+    for p, key in files:
+        if p == path and own_entries is not None:
+            _FILE_ENTRIES_CACHE[p] = (key, own_entries)
+            entries = own_entries
+        else:
+            entries = _collect_from_file(p, key)
+        raw_global_entries.extend(entries)
+        for crumb, _ in entries:
+            observed_titles.update(crumb)
+
+    # Build mnemonic -> set of observed titles across all crumbs
+    mnemo_to_titles: Dict[str, Set[str]] = {}
+
+    # Populate mnemonic map using only non-mnemonic-looking titles, so that
+    # mnemonic placeholders in breadcrumbs don't pollute uniqueness checks
+    for title in observed_titles:
+        if _is_potential_mnemonic(title):
+            continue
+        m = compute_mnemonic(title)
+        mnemo_to_titles.setdefault(m, set()).add(title)
+
+    index = _TreeIndex(observed_titles, mnemo_to_titles, {})
+
+    # Group texts by resolved crumbs
+    global_texts: Dict[Tuple[str, ...], List[str]] = {}
+    for crumb, rem in raw_global_entries:
+        rcrumb = index.resolve_crumb(crumb)
+        global_texts.setdefault(rcrumb, []).append(rem)
+
+    # Compute combined text_hash per unique resolved crumb
+    for crumb, texts in global_texts.items():
+        combined_text = "\n".join(texts)
+        index.combined_hash_by_crumb[crumb] = _fingerprint(combined_text)
+
+    index.build_trie()
+    _TREE_CACHE[base_dir] = (files, index)
+    return index
+
+
+def extract_block_comments_from_file(path: str, text: Optional[str] = None) -> List[BlockComment]:
+    """Extract NOTION comments from `path`.
+
+    `text` may carry the already-read file content to avoid reading it again.
+    """
+    if text is None:
+        text = read_source_file(path)
+
+    # Every comment of this file shares the same path string
+    path = sys.intern(path)
+    _, ext = os.path.splitext(path)
+    lang = ext_to_lang(ext)
 
     # First pass: collect NOTION comments in the requested file with text and text_hash only
     # Track which result is currently collecting non-tagged comments (for include_all option)
-    all_bodies = extract_block_comments_from_text(text, lang)
+    # Untagged comments only matter when a tag may carry options such as include_all
+    all_bodies = extract_block_comments_from_text(text, lang, only_notion="NOTION[" not in text)
     results: List[BlockComment] = []
+    # Raw (breadcrumb, text) entries of this file, as _collect_from_file would return them
+    own_entries: List[Tuple[Tuple[str, ...], str]] = []
     prev_bc_main: Optional[Tuple[str, ...]] = None
     current_collector_idx: Optional[int] = None  # Index of result with include_all that's collecting
 
@@ -123,15 +324,15 @@ def extract_block_comments_from_file(path: str) -> List[BlockComment]:
         # Extract optional sort_index and clean breadcrumb
         cleaned_breadcrumb, sort_index = _strip_sort_index(list(breadcrumb))
         prev_bc_main = tuple(cleaned_breadcrumb)
+        own_entries.append((prev_bc_main, remaining))
 
-        text_hash = hashlib.sha256(remaining.encode("utf-8")).hexdigest()
         results.append(
             BlockComment(
                 file_path=path,
                 text=remaining,
                 breadcrumb=cleaned_breadcrumb,
                 sort_index=sort_index,
-                text_hash=text_hash,
+                text_hash="",
                 subtree_hash="",
                 options=options,
             )
@@ -141,80 +342,26 @@ def extract_block_comments_from_file(path: str) -> List[BlockComment]:
         if options.get("include_all"):
             current_collector_idx = len(results) - 1
 
-    # Recompute text_hash for any results that collected additional comments
+    # Hash every text once, after include_all collectors have gathered their comments
     for result in results:
-        if result.options.get("include_all"):
-            result.text_hash = hashlib.sha256(result.text.encode("utf-8")).hexdigest()
+        result.text_hash = _fingerprint(result.text)
 
     # Build a global map of crumb -> concatenated text across all files under the same directory as `path`
-    base_dir = os.path.dirname(path)
-
-    # First collect all raw crumbs/texts from the tree to build a mnemonic map
-    raw_global_entries: List[Tuple[Tuple[str, ...], str]] = []
-    for p in iter_source_files(base_dir):
-        for crumb, rem in _collect_from_file(p):
-            raw_global_entries.append((crumb, rem))
-
-    # Build mnemonic -> set of observed titles (segment strings) across all crumbs
-    mnemo_to_titles: Dict[str, Set[str]] = {}
-    observed_titles: Set[str] = set()
-    for crumb, _ in raw_global_entries:
-        for seg in crumb:
-            observed_titles.add(seg)
-
-    def is_potential_mnemonic(s: str) -> bool:
-        # Consider 3-char uppercase strings that equal their own mnemonic as mnemonic tokens
-        return len(s) == 3 and compute_mnemonic(s) == s.upper()
-
-    # Populate mnemonic map using only non-mnemonic-looking titles, so that
-    # mnemonic placeholders in breadcrumbs don't pollute uniqueness checks
-    for title in observed_titles:
-        if is_potential_mnemonic(title):
-            continue
-        m = compute_mnemonic(title)
-        mnemo_to_titles.setdefault(m, set()).add(title)
-
-    def resolve_segment(seg: str) -> str:
-        # If seg is exactly a known non-mnemonic-looking title, keep as is
-        if seg in observed_titles and not is_potential_mnemonic(seg):
-            return seg
-        # If looks like a 3-char mnemonic, try to resolve to a unique title
-        if len(seg) == 3:
-            m = seg.upper()
-            titles = mnemo_to_titles.get(m)
-            if titles and len(titles) == 1:
-                return next(iter(titles))
-        return seg
-
-    def resolve_crumb(crumb: Tuple[str, ...]) -> Tuple[str, ...]:
-        return tuple(resolve_segment(s) for s in crumb)
-
-    # Group texts by resolved crumbs
-    global_texts: Dict[Tuple[str, ...], List[str]] = {}
-    for crumb, rem in raw_global_entries:
-        rcrumb = resolve_crumb(crumb)
-        global_texts.setdefault(rcrumb, []).append(rem)
-
-    # Compute combined text_hash per unique resolved crumb
-    combined_hash_by_crumb: Dict[Tuple[str, ...], str] = {}
-    for crumb, texts in global_texts.items():
-        combined_text = "\n".join(texts)
-        combined_hash_by_crumb[crumb] = hashlib.sha256(combined_text.encode("utf-8")).hexdigest()
+    index = _tree_index(os.path.dirname(path), path, own_entries)
+    resolve_crumb = index.resolve_crumb
 
-    # Resolve breadcrumbs for current file results as well
+    # Resolve breadcrumbs for current file results as well, then compute subtree hashes
+    # by aggregating combined descendant text hashes across all files
+    # Comments sharing a crumb (e.g. split across a file) share its subtree hash
+    subtree_by_crumb: Dict[Tuple[str, ...], str] = {}
     for r in results:
-        r.breadcrumb = list(resolve_crumb(tuple(r.breadcrumb)))
-
-    # Second pass: compute subtree hashes by aggregating combined descendant text hashes across all files
-    for i, c in enumerate(results):
-        crumb = tuple(c.breadcrumb)
-        descendant_hashes: List[Tuple[Tuple[str, ...], str]] = []
-        for other_crumb, h in combined_hash_by_crumb.items():
-            if len(crumb) < len(other_crumb) and list(crumb) == list(other_crumb[: len(crumb)]):
-                descendant_hashes.append((other_crumb, h))
-        descendant_hashes.sort(key=lambda x: x[0])
-        combined = "\n".join(h for _path, h in descendant_hashes)
-        results[i].subtree_hash = hashlib.sha256(combined.encode("utf-8")).hexdigest()
+        crumb = resolve_crumb(tuple(r.breadcrumb))
+        r.breadcrumb = list(crumb)
+        subtree_hash = subtree_by_crumb.get(crumb)
+        if subtree_hash is None:
+            combined = "\n".join(h for _path, h in index.descendant_hashes(crumb))
+            subtree_hash = subtree_by_crumb[crumb] = _fingerprint(combined)
+        r.subtree_hash = subtree_hash
 
     return results
 
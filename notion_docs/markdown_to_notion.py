@@ -1,416 +1,751 @@
+import json
 import logging
-from typing import List, Optional, Any, Dict
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice, repeat
+from typing import Callable, Dict, List, Optional, Tuple
 
 from markdown_it import MarkdownIt
 from markdown_it.token import Token
 from urllib.parse import urlparse
 import re
+import sys
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Building a MarkdownIt instance compiles its rule chains; parse() keeps all per-call
+# state in a fresh StateCore, so a single configured parser can be shared.
+_MD_PARSER = MarkdownIt("commonmark").enable('table')
+# Rule lookup caches are filled lazily (and non-atomically) on first use; one parse at
+# import fills every chain, so later parses from several threads only read them.
+_MD_PARSER.parse("x")
 
-def markdown_to_blocks(md: str, quote_color: str = "default", inline_code_color: str = "default") -> List[dict]:
-    """Convert Markdown to Notion blocks using a structured Markdown parser (markdown-it-py).
-    Supported blocks: headings (h1–h3), paragraphs, blockquotes, bulleted lists, fenced code, simple tables.
-    Supported inline: bold, italic, inline code.
 
-    Args:
-        md: Markdown text to convert
-        quote_color: Notion color for quote blocks (default: "default")
-        inline_code_color: Notion color for inline code (default: "default")
-    """
-    md = md or ""
-    md_parser = MarkdownIt("commonmark").enable('table')
-    tokens: List[Token] = md_parser.parse(md)
+# One shared annotations dict per (bold, italic, code, color); segments must not mutate them
+_ANNOTATIONS: Dict[Tuple[bool, bool, bool, str], dict] = {}
 
-    def make_annotations(*, bold: bool = False, italic: bool = False, code: bool = False, color: str = "default") -> dict:
-        return {
-            "bold": bool(bold),
-            "italic": bool(italic),
+
+def _make_annotations(*, bold: bool = False, italic: bool = False, code: bool = False, color: str = "default") -> dict:
+    key = (bool(bold), bool(italic), bool(code), color)
+    ann = _ANNOTATIONS.get(key)
+    if ann is None:
+        ann = _ANNOTATIONS[key] = {
+            "bold": key[0],
+            "italic": key[1],
             "strikethrough": False,
             "underline": False,
-            "code": bool(code),
+            "code": key[2],
             "color": color,
         }
+    return ann
 
-    def is_valid_url(url: Optional[str]) -> bool:
-        """Check if a URL has a valid http/https scheme (required by Notion API)."""
-        if not url:
-            return False
-        try:
-            u = urlparse(url)
-            return u.scheme in ("http", "https")
-        except Exception:
-            return False
 
-    def is_notion_url(url: Optional[str]) -> bool:
-        if not url:
-            return False
+# Default-color variants are built up front so hot paths can index _ANNOTATIONS directly
+for _bold in (False, True):
+    for _italic in (False, True):
+        for _code in (False, True):
+            _make_annotations(bold=_bold, italic=_italic, code=_code)
+del _bold, _italic, _code
+
+_DEFAULT_ANNOTATIONS = _make_annotations()
+
+
+def _text_segment(content: str, annotations: dict = _DEFAULT_ANNOTATIONS, link: Optional[str] = None) -> dict:
+    """Build a rich_text entry of type text; every text segment is created here."""
+    if link is None:
+        return {"type": "text", "text": {"content": content}, "annotations": annotations}
+    return {"type": "text", "text": {"content": content, "link": {"url": link}}, "annotations": annotations}
+
+
+# Fast paths for the common case of a clean absolute http(s) URL; anything unusual
+# (whitespace, ports, credentials, non-ASCII hosts) still goes through urlparse.
+_RE_HTTP_SCHEME = re.compile(r"https?:", re.IGNORECASE)
+_RE_HTTP_HOST = re.compile(r"https?://([A-Za-z0-9._~%!$&'()*+,;=-]*)(?=[/?#]|\Z)", re.IGNORECASE)
+_RE_PAGE_ID = re.compile(r"([0-9a-fA-F]{32}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})")
+
+
+def _is_valid_url(url: Optional[str]) -> bool:
+    """Check if a URL has a valid http/https scheme (required by Notion API)."""
+    if not url:
+        return False
+    if _RE_HTTP_SCHEME.match(url):
+        return True
+    try:
+        u = urlparse(url)
+        return u.scheme in ("http", "https")
+    except Exception:
+        return False
+
+
+def _is_notion_url(url: Optional[str]) -> bool:
+    if not url:
+        return False
+    m = _RE_HTTP_HOST.match(url)
+    if m:
+        host = m.group(1).lower()
+    else:
         try:
             u = urlparse(url)
             host = (u.netloc or "").lower()
-            # notion main domains and public site domains
-            return host.endswith("notion.so") or host.endswith("notion.site")
         except Exception:
             return False
+    # notion main domains and public site domains
+    return host.endswith("notion.so") or host.endswith("notion.site")
 
-    def extract_page_id(url: Optional[str]) -> Optional[str]:
-        """Extract and normalize a Notion page ID from the given URL.
-        Returns hyphenated lowercase UUID if found, else None.
-        """
-        if not url:
-            return None
-        m = re.search(r"([0-9a-fA-F]{32}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})", url)
-        if not m:
-            return None
-        token = m.group(1).lower()
-        if len(token) == 32:
-            # insert dashes 8-4-4-4-12
-            return f"{token[0:8]}-{token[8:12]}-{token[12:16]}-{token[16:20]}-{token[20:32]}"
-        return token
-
-    def rich_from_inline(inline: Token) -> List[dict]:
-        bold = False
-        italic = False
-        current_link: Optional[str] = None
-        segments: List[dict] = []
-        buf: List[str] = []
-
-        def flush_buf():
-            nonlocal buf, bold, italic, current_link
-            if buf:
-                content_text = "".join(buf)
-                if current_link and is_notion_url(current_link):
-                    page_id = extract_page_id(current_link)
-                    if page_id:
-                        segments.append({
-                            "type": "mention",
-                            "mention": {
-                                "type": "page",
-                                "page": {"id": page_id},
-                            },
-                            "annotations": make_annotations(bold=bold, italic=italic),
-                            "plain_text": content_text,
-                            "href": current_link,
-                        })
-                        buf.clear()
-                        return
-                # default: plain text (possibly linked)
-                text_obj: Dict[str, Any] = {"content": content_text}
-                if current_link and is_valid_url(current_link):
-                    text_obj["link"] = {"url": current_link}
-                elif current_link:
-                    logger.error("Invalid URL for link (missing http/https scheme), skipping: %s", current_link)
-                segments.append({
-                    "type": "text",
-                    "text": text_obj,
-                    "annotations": make_annotations(bold=bold, italic=italic),
-                })
-                buf.clear()
-
-        for t in inline.children or []:
-            if t.type == "text":
-                buf.append(t.content)
-            elif t.type == "code_inline":
-                flush_buf()
-                # If inside a Notion link, emit a mention segment with the code content as plain_text
-                if current_link and is_notion_url(current_link):
-                    page_id = extract_page_id(current_link)
-                    if page_id:
-                        segments.append({
-                            "type": "mention",
-                            "mention": {
-                                "type": "page",
-                                "page": {"id": page_id},
-                            },
-                            "annotations": make_annotations(code=True, color=inline_code_color),
-                            "plain_text": t.content,
-                            "href": current_link,
-                        })
-                        continue
-                text_obj: Dict[str, Any] = {"content": t.content}
-                if current_link and is_valid_url(current_link):
-                    text_obj["link"] = {"url": current_link}
-                elif current_link:
-                    logger.error("Invalid URL for link (missing http/https scheme), skipping: %s", current_link)
-                segments.append({
-                    "type": "text",
-                    "text": text_obj,
-                    "annotations": make_annotations(code=True, color=inline_code_color),
-                })
-            elif t.type == "strong_open":
-                flush_buf()
-                bold = True
-            elif t.type == "strong_close":
-                flush_buf()
-                bold = False
-            elif t.type == "em_open":
-                flush_buf()
-                italic = True
-            elif t.type == "em_close":
-                flush_buf()
-                italic = False
-            elif t.type == "link_open":
-                flush_buf()
-                try:
-                    href = t.attrGet("href")
-                except Exception:
-                    href = None
-                current_link = href
-            elif t.type == "link_close":
-                flush_buf()
-                current_link = None
-            elif t.type == "softbreak":
-                buf.append(" ")
-            elif t.type == "hardbreak":
-                # Preserve explicit hard line breaks (two trailing spaces or backslash EOL)
-                # by inserting a newline into the text buffer. This avoids relying on
-                # trailing spaces in source files, which some IDEs trim automatically.
-                buf.append("\n")
-            else:
-                # Skip unsupported inline tokens safely
-                pass
-        flush_buf()
-        return segments
-
-    blocks: List[dict] = []
-    i = 0
 
-    while i < len(tokens):
-        tok = tokens[i]
-        if tok.type == "heading_open":
-            level = int(tok.tag[1]) if tok.tag.startswith("h") else 1
-            inline = tokens[i + 1] if i + 1 < len(tokens) and tokens[i + 1].type == "inline" else None
-            content = rich_from_inline(inline) if inline else []
-            level = max(1, min(level, 3))
-            key = f"heading_{level}"
-            blocks.append({"type": key, key: {"rich_text": content}})
-            # skip inline and heading_close
-            i += 3
-            continue
+def _extract_page_id(url: Optional[str]) -> Optional[str]:
+    """Extract and normalize a Notion page ID from the given URL.
+    Returns hyphenated lowercase UUID if found, else None.
+    """
+    if not url:
+        return None
+    m = _RE_PAGE_ID.search(url)
+    if not m:
+        return None
+    token = m.group(1).lower()
+    if len(token) == 32:
+        # insert dashes 8-4-4-4-12
+        return f"{token[0:8]}-{token[8:12]}-{token[12:16]}-{token[16:20]}-{token[20:32]}"
+    return token
 
-        if tok.type == "paragraph_open":
-            inline = tokens[i + 1] if i + 1 < len(tokens) and tokens[i + 1].type == "inline" else None
-            content = rich_from_inline(inline) if inline else []
-            blocks.append({"type": "paragraph", "paragraph": {"rich_text": content}})
-            i += 3
-            continue
 
-        if tok.type == "blockquote_open":
-            # Blockquotes can contain multiple paragraphs and other blocks
-            # We'll collect all inline content within the blockquote and combine them
-            i += 1
-            quote_content: List[dict] = []
-            while i < len(tokens) and tokens[i].type != "blockquote_close":
-                if tokens[i].type == "paragraph_open":
-                    inline = tokens[i + 1] if i + 1 < len(tokens) and tokens[i + 1].type == "inline" else None
-                    if inline:
-                        # Add paragraph content to quote
-                        paragraph_content = rich_from_inline(inline)
-                        if quote_content and paragraph_content:
-                            # Add a newline between paragraphs within the quote
-                            quote_content.append({
-                                "type": "text",
-                                "text": {"content": "\n"},
-                                "annotations": make_annotations(color=quote_color),
-                            })
-                        quote_content.extend(paragraph_content)
-                    i += 3  # skip paragraph_open, inline, paragraph_close
-                else:
-                    i += 1
-            # Apply quote_color to all rich text segments in the quote
-            for segment in quote_content:
-                if "annotations" in segment:
-                    segment["annotations"]["color"] = quote_color
-            # Add the complete quote block with color property for the bar
-            blocks.append({
-                "type": "quote",
-                "quote": {
-                    "rich_text": quote_content if quote_content else [],
-                    "color": quote_color,
-                },
-            })
-            # consume blockquote_close
-            i += 1
-            continue
+# Links repeat within and across documents; all checks are pure functions of the URL
+@lru_cache(maxsize=1024)
+def _link_target(url: str) -> Tuple[Optional[str], bool]:
+    """Classify a link once: the page ID of a Notion page URL (None for other links),
+    and whether the URL has the http/https scheme Notion requires for text links."""
+    page_id = _extract_page_id(url) if _is_notion_url(url) else None
+    return page_id, _is_valid_url(url)
 
-        if tok.type == "bullet_list_open":
-            # Process list items, handling nested lists recursively
-            def process_list_item(start_idx: int) -> tuple[dict, int]:
-                """Process a single list item and return (block, next_index).
-                Handles nested lists by adding them as children."""
-                # start_idx points to list_item_open
-                j = start_idx + 1
-                inline = None
-                nested_children = []
-
-                # Scan through the list item to find inline content and nested lists
-                while j < len(tokens) and tokens[j].type != "list_item_close":
-                    if tokens[j].type == "inline" and inline is None:
-                        # Capture the first inline content for this item
-                        inline = tokens[j]
-                        j += 1
-                    elif tokens[j].type == "bullet_list_open":
-                        # Found a nested list - process it recursively
-                        j += 1  # move past bullet_list_open
-                        while j < len(tokens) and tokens[j].type != "bullet_list_close":
-                            if tokens[j].type == "list_item_open":
-                                nested_block, j = process_list_item(j)
-                                nested_children.append(nested_block)
-                            else:
-                                j += 1
-                        j += 1  # consume bullet_list_close
-                    else:
-                        j += 1
-
-                # Build the list item block
-                content = rich_from_inline(inline) if inline else []
-                item_block = {
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {"rich_text": content},
-                }
-
-                # Add nested children if any
-                if nested_children:
-                    item_block["children"] = nested_children
-
-                # j should now be at list_item_close
-                return item_block, j + 1  # return next index after list_item_close
-
-            # Process all top-level list items
-            i += 1
-            while i < len(tokens) and tokens[i].type != "bullet_list_close":
-                if tokens[i].type == "list_item_open":
-                    item_block, i = process_list_item(i)
-                    blocks.append(item_block)
-                else:
-                    i += 1
-            # consume bullet_list_close
-            i += 1
-            continue
 
-        if tok.type == "fence":
-            language = (tok.info or "").strip() or "plain text"
-            blocks.append({
-                "type": "code",
-                "code": {
-                    "rich_text": [{"type": "text", "text": {"content": tok.content.rstrip('\n')}}],
-                    "language": language,
+class _InlineState:
+    """Mutable state shared by the inline token handlers while building rich_text segments."""
+
+    __slots__ = ("bold", "italic", "current_link", "link_page_id", "link_valid", "segments", "buf", "inline_code_color")
+
+    def __init__(self, inline_code_color: str) -> None:
+        self.bold = False
+        self.italic = False
+        self.current_link: Optional[str] = None
+        # Classification of current_link, set when the link opens (see _link_target)
+        self.link_page_id: Optional[str] = None
+        self.link_valid = False
+        self.segments: List[dict] = []
+        # Pending text of the current run. markdown-it already merges adjacent text tokens, so
+        # runs are short: "".join on a list beats io.StringIO here and returns a lone piece as is.
+        self.buf: List[str] = []
+        self.inline_code_color = inline_code_color
+
+    def flush(self) -> None:
+        """Emit the pending text run as one segment with the current bold/italic state."""
+        buf = self.buf
+        if buf:
+            _append_segment(self, "".join(buf), _ANNOTATIONS[(self.bold, self.italic, False, "default")])
+            buf.clear()
+
+
+def _append_segment(st: _InlineState, content: str, annotations: dict) -> None:
+    """Append `content` as a text segment, linked to the current link if any.
+
+    Inside a Notion page link a page mention is emitted instead, with `content` as plain_text.
+    """
+    current_link = st.current_link
+    link = None
+    if current_link:
+        page_id = st.link_page_id
+        if page_id:
+            st.segments.append({
+                "type": "mention",
+                "mention": {
+                    "type": "page",
+                    "page": {"id": page_id},
                 },
+                "annotations": annotations,
+                "plain_text": content,
+                "href": current_link,
             })
-            i += 1
+            return
+        # default: plain text (possibly linked)
+        if st.link_valid:
+            link = current_link
+    segments = st.segments
+    if segments:
+        # Extend the previous segment when it renders identically, e.g. around skipped inline
+        # HTML or adjacent links to the same URL; annotations are shared, so identity suffices
+        prev = segments[-1]
+        if prev["annotations"] is annotations and prev["type"] == "text":
+            prev_text = prev["text"]
+            prev_link = prev_text.get("link")
+            if (prev_link["url"] if prev_link else None) == link:
+                prev_text["content"] += content
+                return
+    segments.append(_text_segment(content, annotations, link))
+
+
+def _h_text(t: Token, st: _InlineState) -> None:
+    st.buf.append(t.content)
+
+
+def _h_code_inline(t: Token, st: _InlineState) -> None:
+    st.flush()
+    _append_segment(st, t.content, _make_annotations(code=True, color=st.inline_code_color))
+
+
+def _h_strong_open(t: Token, st: _InlineState) -> None:
+    st.flush()
+    st.bold = True
+
+
+def _h_strong_close(t: Token, st: _InlineState) -> None:
+    st.flush()
+    st.bold = False
+
+
+def _h_em_open(t: Token, st: _InlineState) -> None:
+    st.flush()
+    st.italic = True
+
+
+def _h_em_close(t: Token, st: _InlineState) -> None:
+    st.flush()
+    st.italic = False
+
+
+def _h_link_open(t: Token, st: _InlineState) -> None:
+    st.flush()
+    # Token.attrs is a dict in markdown-it-py 3; its values are typed loosely, hrefs are strings
+    href = t.attrs.get("href")
+    st.current_link = href if isinstance(href, str) else None
+    if st.current_link:
+        st.link_page_id, st.link_valid = _link_target(st.current_link)
+        if not st.link_page_id and not st.link_valid:
+            logger.error("Invalid URL for link (missing http/https scheme), skipping: %s", st.current_link)
+
+
+def _h_link_close(t: Token, st: _InlineState) -> None:
+    st.flush()
+    st.current_link = None
+
+
+def _h_softbreak(t: Token, st: _InlineState) -> None:
+    st.buf.append(" ")
+
+
+def _h_hardbreak(t: Token, st: _InlineState) -> None:
+    # Preserve explicit hard line breaks (two trailing spaces or backslash EOL)
+    # by inserting a newline into the text buffer. This avoids relying on
+    # trailing spaces in source files, which some IDEs trim automatically.
+    st.buf.append("\n")
+
+
+def _h_skip(t: Token, st: _InlineState) -> None:
+    # Skip unsupported inline tokens safely
+    pass
+
+
+_INLINE_HANDLERS: Dict[str, Callable[[Token, _InlineState], None]] = {
+    "text": _h_text,
+    "code_inline": _h_code_inline,
+    "strong_open": _h_strong_open,
+    "strong_close": _h_strong_close,
+    "em_open": _h_em_open,
+    "em_close": _h_em_close,
+    "link_open": _h_link_open,
+    "link_close": _h_link_close,
+    "softbreak": _h_softbreak,
+    "hardbreak": _h_hardbreak,
+}
+
+
+def _index_tokens(tokens: List[Token]) -> Tuple[List[int], List[int]]:
+    """Index a token stream in one pass.
+
+    Returns the index of the matching close token for every open token (-1 for
+    other tokens) and the ascending positions of all paragraph_open tokens, which
+    blockquotes gather their content from.
+    """
+    close_of = [-1] * len(tokens)
+    paragraph_opens: List[int] = []
+    stack: List[int] = []
+    for i, t in enumerate(tokens):
+        nesting = t.nesting
+        if nesting == 1:
+            stack.append(i)
+            if t.type == "paragraph_open":
+                paragraph_opens.append(i)
+        elif nesting == -1 and stack:
+            close_of[stack.pop()] = i
+    return close_of, paragraph_opens
+
+
+# Text inserted for soft and hard line breaks, as in _h_softbreak / _h_hardbreak
+_BREAK_TEXT = {"softbreak": " ", "hardbreak": "\n"}
+
+
+def _rich_from_inline(inline: Token, inline_code_color: str) -> List[dict]:
+    children = inline.children or []
+    # Plain text with line breaks only: nothing would flush the buffer, so join it in
+    # one go into a single unformatted segment instead of dispatching every child
+    pieces: List[str] = []
+    for t in children:
+        ttype = t.type
+        if ttype == "text":
+            pieces.append(t.content)
+        elif ttype in _BREAK_TEXT:
+            pieces.append(_BREAK_TEXT[ttype])
+        else:
+            break
+    else:
+        if not pieces:
+            return []
+        return [_text_segment("".join(pieces))]
+    # The scanned prefix is exactly what the text/break handlers would have buffered
+    # (one piece per child), so dispatch resumes at the first formatting token
+    st = _InlineState(inline_code_color)
+    st.buf = pieces
+    handlers = _INLINE_HANDLERS
+    for t in islice(children, len(pieces), None):
+        handlers.get(t.type, _h_skip)(t, st)
+    st.flush()
+    return st.segments
+
+
+# Text that markdown-it turns into a single plain paragraph holding the text unchanged: a single
+# line without inline markup, entities, escapes or HTML, no leading/trailing whitespace (which
+# would be stripped or start an indented code block), and not starting like a list item.
+_RE_PLAIN_TEXT = re.compile(
+    r"(?![-+=\d])[^\s`*_~\[\]<>|#&\\\x00](?:[^`*_~\[\]<>|#&\\\n\r\x00]*[^\s`*_~\[\]<>|#&\\\x00])?"
+)
+
+
+def _plain_paragraph(text: str) -> dict:
+    return {
+        "type": "paragraph",
+        "paragraph": {"rich_text": [_text_segment(text)]},
+    }
+
+
+# Smallest batch that markdown_to_blocks_many converts in worker processes
+PARALLEL_MIN_DOCS = 32
+
+# Conversion results keyed by (markdown, quote_color, inline_code_color), least recently used first.
+# Blocks are stored as JSON: callers detach nested children while uploading, and decoding
+# a private copy with the C JSON parser is cheaper than deep-copying the dict tree.
+_BLOCKS_CACHE: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_BLOCKS_CACHE_SIZE = 4096
+# Pages are converted on several sync threads; lookups reorder and inserts evict entries
+_BLOCKS_CACHE_LOCK = threading.Lock()
+
+
+def markdown_to_blocks(md: str, quote_color: str = "default", inline_code_color: str = "default") -> List[dict]:
+    """Convert Markdown to Notion blocks using a structured Markdown parser (markdown-it-py).
+    Supported blocks: headings (h1–h3), paragraphs, blockquotes, bulleted lists, fenced code, simple tables.
+    Supported inline: bold, italic, inline code.
+
+    Args:
+        md: Markdown text to convert
+        quote_color: Notion color for quote blocks (default: "default")
+        inline_code_color: Notion color for inline code (default: "default")
+    """
+    md = md or ""
+    if _RE_PLAIN_TEXT.fullmatch(md):
+        # Nothing for the parser to interpret; skip tokenizing entirely
+        return [_plain_paragraph(md)]
+    key = (md, quote_color, inline_code_color)
+    with _BLOCKS_CACHE_LOCK:
+        cached = _BLOCKS_CACHE.get(key)
+        if cached is not None:
+            _BLOCKS_CACHE.move_to_end(key)
+    if cached is not None:
+        return json.loads(cached)
+    blocks = _convert(md, quote_color, inline_code_color)
+    _cache_blocks(key, blocks)
+    return blocks
+
+
+def _cache_blocks(key: Tuple[str, str, str], blocks: List[dict]) -> str:
+    encoded = json.dumps(blocks, ensure_ascii=False)
+    with _BLOCKS_CACHE_LOCK:
+        _BLOCKS_CACHE[key] = encoded
+        if len(_BLOCKS_CACHE) > _BLOCKS_CACHE_SIZE:
+            _BLOCKS_CACHE.popitem(last=False)
+    return encoded
+
+
+def markdown_to_blocks_many(
+    mds: List[str],
+    quote_color: str = "default",
+    inline_code_color: str = "default",
+    workers: Optional[int] = None,
+) -> List[List[dict]]:
+    """Convert several Markdown documents, returning their blocks in input order.
+
+    Cached and repeated documents are converted once, in-process. When at least
+    PARALLEL_MIN_DOCS distinct documents remain they are converted in worker
+    processes, and their results are cached here; smaller batches stay in-process,
+    where process start-up would dominate.
+    """
+    pending: Dict[str, List[int]] = {}
+    for i, md in enumerate(mds):
+        md = md or ""
+        if not _RE_PLAIN_TEXT.fullmatch(md) and (md, quote_color, inline_code_color) not in _BLOCKS_CACHE:
+            pending.setdefault(md, []).append(i)
+    if len(pending) < PARALLEL_MIN_DOCS:
+        return [markdown_to_blocks(md, quote_color, inline_code_color) for md in mds]
+    results: List[Optional[List[dict]]] = [None] * len(mds)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        converted = ex.map(_convert, pending, repeat(quote_color), repeat(inline_code_color), chunksize=8)
+        for (md, indices), blocks in zip(pending.items(), converted):
+            encoded = _cache_blocks((md, quote_color, inline_code_color), blocks)
+            results[indices[0]] = blocks
+            # Repeats get private copies, as from a cache hit
+            for i in islice(indices, 1, None):
+                results[i] = json.loads(encoded)
+    return [
+        blocks if blocks is not None else markdown_to_blocks(md, quote_color, inline_code_color)
+        for md, blocks in zip(mds, results)
+    ]
+
+
+class _BlockState:
+    """Token stream, its precomputed structure and the blocks emitted so far for one conversion."""
+
+    __slots__ = ("tokens", "close_of", "paragraph_opens", "quote_color", "inline_code_color", "blocks")
+
+    def __init__(self, tokens: List[Token], quote_color: str, inline_code_color: str) -> None:
+        self.tokens = tokens
+        self.close_of, self.paragraph_opens = _index_tokens(tokens)
+        self.quote_color = quote_color
+        self.inline_code_color = inline_code_color
+        self.blocks: List[dict] = []
+
+
+def _first_inline(st: _BlockState, start_idx: int) -> Optional[Token]:
+    # First inline token inside the container opened at start_idx
+    tokens = st.tokens
+    for j in range(start_idx + 1, st.close_of[start_idx]):
+        if tokens[j].type == "inline":
+            return tokens[j]
+    return None
+
+
+def _inline_rich_text(st: _BlockState, start_idx: int) -> List[dict]:
+    inline = _first_inline(st, start_idx)
+    return _rich_from_inline(inline, st.inline_code_color) if inline else []
+
+
+def _process_list(st: _BlockState, start_idx: int) -> List[dict]:
+    # Walk the list's direct children, jumping over each item's tokens
+    tokens, close_of = st.tokens, st.close_of
+    items: List[dict] = []
+    j = start_idx + 1
+    end = close_of[start_idx]
+    while j < end:
+        if tokens[j].type == "list_item_open":
+            items.append(_process_list_item(st, j))
+            j = close_of[j] + 1
+        else:
+            j += 1
+    return items
+
+
+def _process_list_item(st: _BlockState, start_idx: int) -> dict:
+    """Process a single list item and return its block.
+    Handles nested lists by adding them as children."""
+    tokens, close_of = st.tokens, st.close_of
+    inline = None
+    nested_children: List[dict] = []
+    j = start_idx + 1
+    end = close_of[start_idx]
+    while j < end:
+        t = tokens[j]
+        if t.type == "bullet_list_open":
+            # Nested list: its items become children, then jump past its close
+            nested_children.extend(_process_list(st, j))
+            j = close_of[j] + 1
             continue
+        if t.type == "inline" and inline is None:
+            # Capture the first inline content for this item
+            inline = t
+        j += 1
 
-        if tok.type == "code_block":
-            # Indented code block (no explicit language)
-            blocks.append({
-                "type": "code",
-                "code": {
-                    "rich_text": [{"type": "text", "text": {"content": tok.content.rstrip('\n')}}],
-                    "language": "plain text",
-                },
+    content = _rich_from_inline(inline, st.inline_code_color) if inline else []
+    item_block: dict = {
+        "type": "bulleted_list_item",
+        "bulleted_list_item": {"rich_text": content},
+    }
+    if nested_children:
+        item_block["children"] = nested_children
+    return item_block
+
+
+def _process_row(st: _BlockState, start_idx: int) -> List[List[dict]]:
+    # Rich text of each th/td cell of the row opened at start_idx
+    tokens, close_of = st.tokens, st.close_of
+    cells_rt: List[List[dict]] = []
+    k = start_idx + 1
+    end = close_of[start_idx]
+    while k < end:
+        if tokens[k].type in ("th_open", "td_open"):
+            cells_rt.append(_inline_rich_text(st, k))
+            k = close_of[k] + 1
+        else:
+            k += 1
+    return cells_rt
+
+
+# Notion block type per heading tag; Notion has three heading levels, deeper ones collapse into the last
+_HEADING_TYPES = {
+    "h1": "heading_1",
+    "h2": "heading_2",
+    "h3": "heading_3",
+    "h4": "heading_3",
+    "h5": "heading_3",
+    "h6": "heading_3",
+}
+
+
+# Block handlers take the token index and return the index of the next token to visit
+
+def _b_heading(st: _BlockState, i: int) -> int:
+    key = _HEADING_TYPES.get(st.tokens[i].tag, "heading_1")
+    st.blocks.append({"type": key, key: {"rich_text": _inline_rich_text(st, i)}})
+    return st.close_of[i] + 1
+
+
+def _b_paragraph(st: _BlockState, i: int) -> int:
+    st.blocks.append({"type": "paragraph", "paragraph": {"rich_text": _inline_rich_text(st, i)}})
+    return st.close_of[i] + 1
+
+
+def _b_blockquote(st: _BlockState, i: int) -> int:
+    # Blockquotes can contain multiple paragraphs and other blocks
+    # We'll collect all paragraph content within the blockquote and combine them
+    quote_color = st.quote_color
+    paragraph_opens = st.paragraph_opens
+    end = st.close_of[i]
+    quote_content: List[dict] = []
+    for p in islice(paragraph_opens, bisect_right(paragraph_opens, i), None):
+        if p > end:
+            break
+        inline = _first_inline(st, p)
+        if inline:
+            paragraph_content = _rich_from_inline(inline, st.inline_code_color)
+            if quote_content and paragraph_content:
+                # Add a newline between paragraphs within the quote
+                quote_content.append(_text_segment("\n", _make_annotations(color=quote_color)))
+            quote_content.extend(paragraph_content)
+    # Apply quote_color to all rich text segments in the quote
+    for segment in quote_content:
+        ann = segment.get("annotations")
+        if ann is not None:
+            segment["annotations"] = _make_annotations(
+                bold=ann["bold"], italic=ann["italic"], code=ann["code"], color=quote_color
+            )
+    # Add the complete quote block with color property for the bar
+    st.blocks.append({
+        "type": "quote",
+        "quote": {
+            "rich_text": quote_content if quote_content else [],
+            "color": quote_color,
+        },
+    })
+    return end + 1
+
+
+def _b_bullet_list(st: _BlockState, i: int) -> int:
+    st.blocks.extend(_process_list(st, i))
+    return st.close_of[i] + 1
+
+
+# Longest text content Notion accepts in a single rich_text item, in UTF-16 code units
+RICH_TEXT_MAX_CHARS = 2000
+
+
+def _utf16_len(s: str) -> int:
+    # Notion measures text lengths in UTF-16 code units: characters outside the BMP count twice
+    return len(s.encode("utf-16-le")) // 2
+
+
+def _split_utf16(content: str, limit: int) -> List[str]:
+    if content.isascii():
+        return [content[k:k + limit] for k in range(0, len(content), limit)]
+    pieces: List[str] = []
+    start = units = 0
+    for k, ch in enumerate(content):
+        width = 2 if ord(ch) > 0xFFFF else 1
+        if units + width > limit:
+            pieces.append(content[start:k])
+            start, units = k, 0
+        units += width
+    pieces.append(content[start:])
+    return pieces
+
+
+def _code_block(content: str, language: str) -> dict:
+    # Code keeps its text verbatim except for the newlines before the closing fence
+    content = content.rstrip('\n')
+    if len(content) <= RICH_TEXT_MAX_CHARS // 2 or _utf16_len(content) <= RICH_TEXT_MAX_CHARS:
+        rich_text = [{"type": "text", "text": {"content": content}}]
+    else:
+        # Long code is split into consecutive items, which Notion renders as one block
+        rich_text = [{"type": "text", "text": {"content": piece}} for piece in _split_utf16(content, RICH_TEXT_MAX_CHARS)]
+    return {
+        "type": "code",
+        "code": {
+            "rich_text": rich_text,
+            "language": language,
+        },
+    }
+
+
+def _b_fence(st: _BlockState, i: int) -> int:
+    tok = st.tokens[i]
+    info = tok.info
+    # Languages repeat across fences; interning keeps one shared string per language
+    language = (sys.intern(info.strip()) if info else "") or "plain text"
+    st.blocks.append(_code_block(tok.content, language))
+    return i + 1
+
+
+def _b_code_block(st: _BlockState, i: int) -> int:
+    # Indented code block (no explicit language)
+    st.blocks.append(_code_block(st.tokens[i].content, "plain text"))
+    return i + 1
+
+
+def _b_table(st: _BlockState, i: int) -> int:
+    # Parse a simple GFM-style table into a Notion table block
+    tokens, close_of = st.tokens, st.close_of
+    has_header = False
+    rows: List[dict] = []
+    table_width = 0
+    ragged = False
+    end = close_of[i]
+    # Single forward pass over thead/tbody; each row is consumed and skipped as a whole
+    j = i + 1
+    while j < end:
+        part = tokens[j].type
+        if part == "tr_open":
+            cells_rt = _process_row(st, j)
+            if len(cells_rt) != table_width:
+                if rows:
+                    ragged = True
+                table_width = max(table_width, len(cells_rt))
+            rows.append({
+                "type": "table_row",
+                "table_row": {"cells": cells_rt},
             })
-            i += 1
+            j = close_of[j] + 1
             continue
+        if part == "thead_open":
+            has_header = True
+        j += 1
+    # markdown-it emits every row with the header's cell count; only other shapes need
+    # normalizing each row to table_width by padding empty cells
+    for r in rows if ragged else ():
+        cells = r["table_row"]["cells"]
+        if len(cells) < table_width:
+            # pad with empty rich_text cells; the empties may be shared as cells are never mutated
+            cells.extend([[]] * (table_width - len(cells)))
+        elif len(cells) > table_width and table_width > 0:
+            del cells[table_width:]
+    st.blocks.append({
+        "type": "table",
+        "table": {
+            "table_width": table_width or 0,
+            "has_column_header": has_header,
+            "has_row_header": False,
+        },
+        "children": rows,
+    })
+    return end + 1
 
-        if tok.type == "table_open":
-            # Parse a simple GFM-style table into a Notion table block
-            has_header = False
-            rows: List[dict] = []
-            table_width = 0
-            i += 1
-            # optional thead
-            if i < len(tokens) and tokens[i].type == "thead_open":
-                has_header = True
-                i += 1  # into thead
-                while i < len(tokens) and tokens[i].type != "thead_close":
-                    if tokens[i].type == "tr_open":
-                        i += 1
-                        cells_rt: List[List[dict]] = []
-                        while i < len(tokens) and tokens[i].type != "tr_close":
-                            if tokens[i].type in ("th_open", "td_open"):
-                                # inline is next significant token before th/td_close
-                                inline = None
-                                j = i + 1
-                                while j < len(tokens) and tokens[j].type not in ("th_close", "td_close"):
-                                    if tokens[j].type == "inline":
-                                        inline = tokens[j]
-                                        break
-                                    j += 1
-                                cell_rich = rich_from_inline(inline) if inline else []
-                                cells_rt.append(cell_rich)
-                                # advance to cell close
-                                while i < len(tokens) and tokens[i].type not in ("th_close", "td_close"):
-                                    i += 1
-                                i += 1  # consume close
-                            else:
-                                i += 1
-                        table_width = max(table_width, len(cells_rt))
-                        rows.append({
-                            "type": "table_row",
-                            "table_row": {"cells": cells_rt},
-                        })
-                        i += 1  # consume tr_close
-                    else:
-                        i += 1
-                i += 1  # consume thead_close
-            # tbody (common path)
-            if i < len(tokens) and tokens[i].type == "tbody_open":
-                i += 1
-                while i < len(tokens) and tokens[i].type != "tbody_close":
-                    if tokens[i].type == "tr_open":
-                        i += 1
-                        cells_rt: List[List[dict]] = []
-                        while i < len(tokens) and tokens[i].type != "tr_close":
-                            if tokens[i].type in ("th_open", "td_open"):
-                                inline = None
-                                j = i + 1
-                                while j < len(tokens) and tokens[j].type not in ("th_close", "td_close"):
-                                    if tokens[j].type == "inline":
-                                        inline = tokens[j]
-                                        break
-                                    j += 1
-                                cell_rich = rich_from_inline(inline) if inline else []
-                                cells_rt.append(cell_rich)
-                                while i < len(tokens) and tokens[i].type not in ("th_close", "td_close"):
-                                    i += 1
-                                i += 1  # consume close
-                            else:
-                                i += 1
-                        table_width = max(table_width, len(cells_rt))
-                        rows.append({
-                            "type": "table_row",
-                            "table_row": {"cells": cells_rt},
-                        })
-                        i += 1  # consume tr_close
-                    else:
-                        i += 1
-                i += 1  # consume tbody_close
-            # consume table_close if present
-            if i < len(tokens) and tokens[i].type == "table_close":
-                i += 1
-            # Normalize each row to table_width by padding empty cells
-            for r in rows:
-                cells = r["table_row"]["cells"]
-                if len(cells) < table_width:
-                    # pad with empty rich_text cells
-                    cells.extend([[] for _ in range(table_width - len(cells))])
-                elif len(cells) > table_width and table_width > 0:
-                    del cells[table_width:]
-            table_block = {
-                "type": "table",
-                "table": {
-                    "table_width": table_width or 0,
-                    "has_column_header": has_header,
-                    "has_row_header": False,
-                },
-                "children": rows,
-            }
-            blocks.append(table_block)
-            continue
 
-        # Skip other token types (the close tokens will be consumed by their handlers)
-        i += 1
+_BLOCK_HANDLERS: Dict[str, Callable[[_BlockState, int], int]] = {
+    "heading_open": _b_heading,
+    "paragraph_open": _b_paragraph,
+    "blockquote_open": _b_blockquote,
+    "bullet_list_open": _b_bullet_list,
+    "fence": _b_fence,
+    "code_block": _b_code_block,
+    "table_open": _b_table,
+}
 
-    logger.debug("Converted markdown to %d Notion blocks via markdown-it-py", len(blocks))
-    return blocks
+
+def _convert(md: str, quote_color: str, inline_code_color: str) -> List[dict]:
+    return _blocks_from_tokens(_MD_PARSER.parse(md), quote_color, inline_code_color)
+
+
+def _blocks_from_tokens(tokens: List[Token], quote_color: str, inline_code_color: str) -> List[dict]:
+    st = _BlockState(tokens, quote_color, inline_code_color)
+    handlers = _BLOCK_HANDLERS
+    i = 0
+    n = len(tokens)
+    while i < n:
+        handler = handlers.get(tokens[i].type)
+        # Other tokens: descend into their containers (close tokens are skipped here)
+        i = handler(st, i) if handler is not None else i + 1
+
+    logger.debug("Converted markdown to %d Notion blocks via markdown-it-py", len(st.blocks))
+    return st.blocks
+
+
+class StreamingMarkdownConverter:
+    """Convert Markdown that arrives in chunks, emitting blocks as soon as they are complete.
+
+    A top-level block is complete once another top-level block has started after it; its
+    text is then dropped and only the remainder is parsed again on the next feed(). Link
+    reference definitions from dropped text stay available to later links. The emitted
+    blocks match markdown_to_blocks on the whole text, except for links that refer to a
+    definition given further down.
+    """
+
+    def __init__(self, quote_color: str = "default", inline_code_color: str = "default") -> None:
+        self.quote_color = quote_color
+        self.inline_code_color = inline_code_color
+        self._pending = ""
+        # A trailing '\r' may be the first half of a '\r\n' split across chunks
+        self._held_cr = False
+        self._references: Dict[str, dict] = {}
+
+    def _parse(self, text: str) -> Tuple[List[Token], dict]:
+        env: dict = {"references": dict(self._references)}
+        return _MD_PARSER.parse(text, env), env
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Add text and return the blocks completed by it."""
+        text = ("\r" if self._held_cr else "") + chunk
+        self._held_cr = text.endswith("\r")
+        if self._held_cr:
+            text = text[:-1]
+        # Same newline normalization as markdown-it, so token line maps index our lines
+        self._pending += text.replace("\r\n", "\n").replace("\r", "\n")
+
+        tokens, _ = self._parse(self._pending)
+        # Token index and start line of the last top-level block
+        last, cut_line = -1, 0
+        for k, t in enumerate(tokens):
+            if t.level == 0 and t.nesting != -1 and t.map:
+                last, cut_line = k, t.map[0]
+        if last <= 0:
+            return []
+        lines = self._pending.split("\n")
+        done = "\n".join(lines[:cut_line])
+        self._pending = "\n".join(lines[cut_line:])
+        if "]:" in done:
+            # Keep reference definitions of the dropped text for links still to come
+            self._references = self._parse(done)[1].get("references", self._references)
+        return _blocks_from_tokens(tokens[:last], self.quote_color, self.inline_code_color)
+
+    def close(self) -> List[dict]:
+        """Return the blocks of the remaining text and reset the converter."""
+        text = self._pending + ("\n" if self._held_cr else "")
+        tokens, _ = self._parse(text)
+        self._pending = ""
+        self._held_cr = False
+        self._references = {}
+        return _blocks_from_tokens(tokens, self.quote_color, self.inline_code_color)
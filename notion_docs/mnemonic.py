@@ -1,6 +1,14 @@
 import re
+from functools import lru_cache
 
 
+_RE_NON_ALNUM = re.compile(r"[^A-Za-z0-9]")
+_CONSONANTS = frozenset("BCDFGHJKLMNPQRSTVWXYZ")
+
+
+# Titles repeat across lookups during a sync; the result depends on the title only
+# (no locale or time dependence), so it is cached for the whole run
+@lru_cache(maxsize=8192)
 def compute_mnemonic(title: str) -> str:
     """Compute a 3-character uppercase mnemonic from the given title.
     Rules:
@@ -13,33 +21,15 @@ def compute_mnemonic(title: str) -> str:
     if not title:
         return "XXX"
     # Keep only ASCII letters and digits; drop spaces/symbols
-    cleaned = re.sub(r"[^A-Za-z0-9]", "", title)
+    cleaned = _RE_NON_ALNUM.sub("", title)
     if not cleaned:
         return "XXX"
     upper = cleaned.upper()
-    first = upper[0]
-    # Prepare lists for scanning after the first char
     rest = upper[1:]
-    consonants = []
-    others = []
-    vowels = set("AEIOU")
-    for ch in rest:
-        if ch.isalpha():
-            if ch not in vowels:  # treat Y as consonant
-                consonants.append(ch)
-            else:
-                others.append(ch)
-        elif ch.isdigit():
-            others.append(ch)
-        # ignore anything else (shouldn't exist after cleaning)
-    result = [first]
-    # Take up to two consonants
-    while len(result) < 3 and consonants:
-        result.append(consonants.pop(0))
-    # If still short, take from others
-    while len(result) < 3 and others:
-        result.append(others.pop(0))
+    # Take up to two consonants (Y counts as consonant) after the first char
+    picked = [ch for ch in rest if ch in _CONSONANTS][:2]
+    # If still short, take from the others (vowels and digits), in order
+    if len(picked) < 2:
+        picked += [ch for ch in rest if ch not in _CONSONANTS][:2 - len(picked)]
     # If still short, pad with 'X'
-    while len(result) < 3:
-        result.append('X')
-    return "".join(result)
+    return (upper[0] + "".join(picked)).ljust(3, "X")
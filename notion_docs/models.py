@@ -1,8 +1,13 @@
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
+# Many comments are alive at once during a sync; slotted instances drop the per-object
+# __dict__. dataclass(slots=...) exists from Python 3.10, older versions keep plain instances.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class BlockComment:
     file_path: str
     text: str  # comment body with breadcrumb removed
@@ -16,4 +21,14 @@ class BlockComment:
     # Options extracted from tag, e.g., NOTION[option1,option2].page
     options: Dict[str, bool] = field(default_factory=dict)
 
-
+    def to_dict(self) -> Dict[str, object]:
+        # Shallow, field-ordered equivalent of dataclasses.asdict for this flat record
+        return {
+            "file_path": self.file_path,
+            "text": self.text,
+            "breadcrumb": self.breadcrumb,
+            "sort_index": self.sort_index,
+            "text_hash": self.text_hash,
+            "subtree_hash": self.subtree_hash,
+            "options": self.options,
+        }
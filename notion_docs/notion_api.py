@@ -1,6 +1,12 @@
 import logging
-from typing import List, Optional, Tuple, Dict, Literal
+import re
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Dict, Literal
 from notion_client import Client
+from notion_client.errors import APIErrorCode, APIResponseError
 
 logger = logging.getLogger(__name__)
 
@@ -8,9 +14,75 @@ logger = logging.getLogger(__name__)
 from .markdown_to_notion import markdown_to_blocks
 from .mnemonic import compute_mnemonic
 
+_RE_NON_ALNUM = re.compile(r"[^A-Za-z0-9]")
+
+
+@lru_cache(maxsize=4096)
+def _norm_title(s: Optional[str]) -> str:
+    # Remove symbols/spaces and casefold for prefix mode comparisons; only ASCII is left, so lower() suffices
+    # Cached: the same titles and segments are normalized again for every lookup under a parent
+    if not s:
+        return ""
+    return _RE_NON_ALNUM.sub("", s).lower()
+
+# Maximum number of children the Notion API accepts in one append request
+APPEND_BATCH_SIZE = 100
+# Maximum number of blocks, nested ones included, the Notion API accepts in one append request
+APPEND_MAX_BLOCKS = 1000
+# Levels of children the Notion API accepts nested under an appended block
+APPEND_NESTING_LEVELS = 2
+# Concurrent block deletions when clearing a page; each one is a separate API round-trip
+DELETE_WORKERS = 4
+# Concurrent page retrievals when prefetching the pages a sync is about to visit
+PREFETCH_WORKERS = 4
+# Attempts per request when the API answers rate_limited, waiting in between
+RATE_LIMIT_ATTEMPTS = 5
+
+
+def _fits_inline(blocks: List[dict], levels: int) -> bool:
+    """Whether detached children (and theirs) can be sent nested within the given number of levels."""
+    if levels <= 0 or len(blocks) > APPEND_BATCH_SIZE:
+        return False
+    return all(not blk.get("children") or _fits_inline(blk["children"], levels - 1) for blk in blocks)
+
+
+def _move_children_inline(blocks: List[dict]) -> None:
+    # The API expects nested children inside the block's type object, next to its rich_text
+    for blk in blocks:
+        children = blk.pop("children", None)
+        if children:
+            _move_children_inline(children)
+            blk.setdefault(blk["type"], {})["children"] = children
+
+
+def _nested_size(block: dict) -> int:
+    payload = block.get(block.get("type"))
+    children = payload.get("children") if isinstance(payload, dict) else None
+    return 1 + sum(_nested_size(child) for child in children or ())
+
+
+class _RateLimitedClient(Client):
+    """Notion SDK client that waits and retries requests answered with rate_limited.
+    Requests are issued from several threads, which can exceed Notion's request rate."""
+
+    def request(self, *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(RATE_LIMIT_ATTEMPTS):
+            try:
+                return super().request(*args, **kwargs)
+            except APIResponseError as e:
+                if e.code != APIErrorCode.RateLimited or attempt == RATE_LIMIT_ATTEMPTS - 1:
+                    raise
+                # Prefer the server's hint, fall back to exponential backoff
+                try:
+                    delay = float(e.headers.get("retry-after", ""))
+                except ValueError:
+                    delay = 2 ** attempt
+                logger.info("Rate limited by Notion, retrying in %.1fs", delay)
+                time.sleep(delay)
+
 class NotionClient:
     def __init__(self, api_key: str, titles_matching: str = "title_only", header: Optional[str] = None, include_files_in_header: bool = False, quote_color: str = "default", inline_code_color: str = "default"):
-        self.client = Client(auth=api_key)
+        self.client = _RateLimitedClient(auth=api_key)
         self.titles_matching = (titles_matching or "title_only").lower()
         self.header = (header or "").strip() or None
         self.include_files_in_header = bool(include_files_in_header)
@@ -18,8 +90,18 @@ class NotionClient:
         self.inline_code_color = inline_code_color
         # Cache for parent type detection (page vs database)
         self._parent_type_cache: Dict[str, Literal["page", "database"]] = {}
+        # Pages fetched during type detection, kept for a single metadata read (see get_metadata)
+        self._retrieved_pages: Dict[str, dict] = {}
         # Cache for database title property names
         self._db_title_property_cache: Dict[str, str] = {}
+        # Cache for retrieved database objects (title property and data sources come from here)
+        self._database_cache: Dict[str, dict] = {}
+        # Cache for block children listings, dropped whenever this client changes them
+        self._children_cache: Dict[str, List[dict]] = {}
+        # Child pages by match key, built from the cached listing (see _child_page_index)
+        self._child_index_cache: Dict[str, Dict[str, Tuple[str, Optional[str]]]] = {}
+        # Child pages sorted by normalized title for prefix matching (see _child_prefix_index)
+        self._child_prefix_cache: Dict[str, List[Tuple[str, int, str, Optional[str]]]] = {}
 
     def _detect_parent_type(self, parent_id: str) -> Literal["page", "database"]:
         """Detect if a parent ID is a page or database by trying to retrieve it."""
@@ -28,7 +110,7 @@ class NotionClient:
 
         # Try to retrieve as a page first
         try:
-            self.client.pages.retrieve(page_id=parent_id)
+            self._retrieved_pages[parent_id] = self.client.pages.retrieve(page_id=parent_id)
             self._parent_type_cache[parent_id] = "page"
             logger.info("Detected %s as a page", parent_id)
             return "page"
@@ -45,6 +127,12 @@ class NotionClient:
                 self._parent_type_cache[parent_id] = "page"
                 return "page"
 
+    def _retrieve_database(self, database_id: str) -> dict:
+        db = self._database_cache.get(database_id)
+        if db is None:
+            db = self._database_cache[database_id] = self.client.databases.retrieve(database_id=database_id)
+        return db
+
     def _get_database_title_property(self, database_id: str) -> Optional[str]:
         """Get the name of the title property for a database.
         Returns None if the database has no properties (e.g., wiki databases)."""
@@ -52,7 +140,7 @@ class NotionClient:
             return self._db_title_property_cache[database_id]
 
         try:
-            db = self.client.databases.retrieve(database_id=database_id)
+            db = self._retrieve_database(database_id)
             properties = db.get("properties", {})
             logger.debug("Database %s properties: %s", database_id, list(properties.keys()))
 
@@ -84,22 +172,44 @@ class NotionClient:
 
     def _append_nested_blocks(self, parent_block_id: str, children: List[dict]) -> None:
         """Recursively append nested blocks to a parent block.
-        Handles nested list items by extracting their children and appending separately."""
-        for child_block in children:
-            child_type = child_block.get("type")
-            # Extract nested children if any (for list items)
-            nested_children = child_block.pop("children", None)
-
-            # Append the child block without its children
-            resp = self.client.blocks.children.append(block_id=parent_block_id, children=[child_block])
+        Blocks are sent in batches of up to APPEND_BATCH_SIZE (and APPEND_MAX_BLOCKS counting nested ones).
+        Nested list items travel inside their parent when they fit the API's nesting limit; deeper ones
+        are detached first and appended under the blocks created for their parents."""
+        batch: List[dict] = []
+        detached: List[Optional[List[dict]]] = []
+        size = 0
+
+        def flush() -> None:
+            resp = self.client.blocks.children.append(block_id=parent_block_id, children=batch)
+            # Created blocks are returned in request order; recurse into those with detached children
+            for nested_children, created in zip(detached, resp.get("results", [])):
+                if nested_children:
+                    created_block_id = created.get("id")
+                    if created_block_id:
+                        self._append_nested_blocks(created_block_id, nested_children)
 
-            # If there are nested children, recursively append them
-            if nested_children:
-                created_block_id = resp.get("results", [{}])[0].get("id")
-                if created_block_id:
-                    self._append_nested_blocks(created_block_id, nested_children)
+        for child_block in children:
+            nested = child_block.get("children")
+            if nested and _fits_inline(nested, APPEND_NESTING_LEVELS):
+                _move_children_inline([child_block])
+                nested = None
+            else:
+                child_block.pop("children", None)
+            block_size = _nested_size(child_block)
+            if batch and (len(batch) == APPEND_BATCH_SIZE or size + block_size > APPEND_MAX_BLOCKS):
+                flush()
+                batch, detached, size = [], [], 0
+            batch.append(child_block)
+            detached.append(nested)
+            size += block_size
+        if batch:
+            flush()
 
     def list_children(self, parent_block_id: str, page_size: int = 100) -> List[dict]:
+        cached = self._children_cache.get(parent_block_id)
+        if cached is not None:
+            logger.debug("Using cached children for parent %s", parent_block_id)
+            return cached
         logger.info("Listing children for parent %s", parent_block_id)
         results: List[dict] = []
         start_cursor: Optional[str] = None
@@ -110,24 +220,68 @@ class NotionClient:
                 break
             start_cursor = resp.get("next_cursor")
         logger.info("Found %d children under %s", len(results), parent_block_id)
+        self._children_cache[parent_block_id] = results
         return results
 
+    def _invalidate_children(self, parent_block_id: str) -> None:
+        self._children_cache.pop(parent_block_id, None)
+        self._child_index_cache.pop(parent_block_id, None)
+        self._child_prefix_cache.pop(parent_block_id, None)
+
+    def _record_child_page(self, parent_page_id: str, title: str, page_id: str) -> None:
+        """Add a page created by this client to its parent's cached listing and indexes,
+        so ensuring the following siblings does not list the parent again."""
+        children = self._children_cache.get(parent_page_id)
+        if children is None:
+            return
+        children.append({"object": "block", "id": page_id, "type": "child_page", "child_page": {"title": title}})
+        index = self._child_index_cache.get(parent_page_id)
+        if index is not None:
+            key = compute_mnemonic(title) if self.titles_matching == "mnemonic" else title.casefold()
+            index.setdefault(key, (title, page_id))
+        prefix_index = self._child_prefix_cache.get(parent_page_id)
+        if prefix_index is not None:
+            insort(prefix_index, (_norm_title(title), len(children) - 1, title, page_id))
+
+    def _child_page_index(self, parent_page_id: str) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Map the match key of each child page to its (title, id).
+        The key is the computed mnemonic in mnemonic mode and the casefolded title otherwise;
+        the first child page wins, as with a linear scan."""
+        index = self._child_index_cache.get(parent_page_id)
+        if index is None:
+            index = {}
+            mnemonic = self.titles_matching == "mnemonic"
+            for blk in self.list_children(parent_page_id):
+                if blk.get("type") != "child_page":
+                    continue
+                title = blk.get("child_page", {}).get("title") or ""
+                key = compute_mnemonic(title) if mnemonic else title.casefold()
+                index.setdefault(key, (title, blk.get("id")))
+            self._child_index_cache[parent_page_id] = index
+        return index
+
+    def _child_prefix_index(self, parent_page_id: str) -> List[Tuple[str, int, str, Optional[str]]]:
+        """List child pages as (normalized title, position, title, id), sorted so that the
+        titles starting with a given segment form one contiguous run."""
+        entries = self._child_prefix_cache.get(parent_page_id)
+        if entries is None:
+            entries = sorted(
+                (_norm_title(blk.get("child_page", {}).get("title") or ""), pos, blk.get("child_page", {}).get("title") or "", blk.get("id"))
+                for pos, blk in enumerate(self.list_children(parent_page_id))
+                if blk.get("type") == "child_page"
+            )
+            self._child_prefix_cache[parent_page_id] = entries
+        return entries
+
     def find_child_page(self, parent_page_id: str, segment: str) -> Optional[str]:
         # For a page parent, the child pages appear as child_page blocks under the page's block children
         # For a database parent, we need to query the database
         logger.info("Searching for child page matching segment '%s' under %s (mode=%s)", segment, parent_page_id, self.titles_matching)
 
-        def norm(s: Optional[str]) -> str:
-            # Remove symbols/spaces and casefold for prefix mode comparisons
-            if not s:
-                return ""
-            import re
-            return re.sub(r"[^A-Za-z0-9]", "", s).casefold()
-
         seg = segment or ""
         seg_cf = seg.casefold()
         seg_upper = seg.upper()
-        seg_norm = norm(seg)
+        seg_norm = _norm_title(seg)
 
         # Detect if parent is a database
         parent_type = self._detect_parent_type(parent_page_id)
@@ -138,7 +292,7 @@ class NotionClient:
                 title_property = self._get_database_title_property(parent_page_id)
 
                 # Get the data_source_id from the database (new API 2025-09-03)
-                db = self.client.databases.retrieve(database_id=parent_page_id)
+                db = self._retrieve_database(parent_page_id)
                 data_sources = db.get("data_sources", [])
                 if not data_sources:
                     logger.warning("Database %s has no data_sources", parent_page_id)
@@ -154,22 +308,20 @@ class NotionClient:
                 pages = resp.get("results", [])
                 logger.debug("Found %d pages matching '%s' in database %s", len(pages), segment, parent_page_id)
 
+                mode = self.titles_matching
                 for page in pages:
                     props = page.get("properties", {})
                     page_id = page.get("id")
 
-                    # Find the title property (it may have any name, but type is "title")
+                    # Find the title property: usually the one named in the schema, otherwise any of type "title"
+                    title_prop = props.get(title_property) if title_property else None
+                    if not title_prop or title_prop.get("type") != "title":
+                        title_prop = next((prop_data for prop_data in props.values() if prop_data.get("type") == "title"), None)
                     title = None
-                    for prop_data in props.values():
-                        if prop_data.get("type") == "title":
-                            title_parts = prop_data.get("title", [])
-                            title = "".join(part.get("plain_text", "") for part in title_parts)
-                            break
+                    if title_prop is not None:
+                        title = "".join(part.get("plain_text", "") for part in title_prop.get("title", []))
 
                     if title:
-
-                        mode = self.titles_matching
-
                         if mode == "title_only":
                             if title.casefold() == seg_cf:
                                 logger.info("Found database page by exact title '%s' (case-insensitive) with id %s", title, page_id)
@@ -180,7 +332,7 @@ class NotionClient:
                                 logger.info("Found database page by computed mnemonic '%s' (title='%s') with id %s", page_mn, title, page_id)
                                 return page_id
                         elif mode == "prefix":
-                            title_norm = norm(title)
+                            title_norm = _norm_title(title)
                             if seg_norm and title_norm.startswith(seg_norm) and title_norm != seg_norm:
                                 logger.info("Found database page by prefix match: segment '%s' matches title '%s' (id=%s)", segment, title, page_id)
                                 return page_id
@@ -196,38 +348,36 @@ class NotionClient:
                 return None
         else:
             # Normal page parent - list child blocks
-            for blk in self.list_children(parent_page_id):
-                if blk.get("type") != "child_page":
-                    continue
-                child = blk.get("child_page", {})
-                title = child.get("title") or ""
-                page_id = blk.get("id")
-
-                mode = self.titles_matching
-
-                if mode == "title_only":
-                    # Only exact case-insensitive title match
-                    if title.casefold() == seg_cf:
-                        logger.info("Found child page by exact title '%s' (case-insensitive) with id %s", title, page_id)
-                        return page_id
-                elif mode == "mnemonic":
+            mode = self.titles_matching
+            if mode == "prefix":
+                # Match only if normalized title starts with normalized segment (symbols ignored, case-insensitive)
+                # Do not match when the normalized segment equals the full normalized title (i.e., exact title)
+                # Candidates are contiguous in the sorted index; the first one in page order wins
+                best = None
+                if seg_norm:
+                    entries = self._child_prefix_index(parent_page_id)
+                    i = bisect_left(entries, (seg_norm,))
+                    while i < len(entries) and entries[i][0].startswith(seg_norm):
+                        if entries[i][0] != seg_norm and (best is None or entries[i][1] < best[1]):
+                            best = entries[i]
+                        i += 1
+                if best is not None:
+                    logger.info("Found child page by prefix match: segment '%s' matches title '%s' (id=%s)", segment, best[2], best[3])
+                    return best[3]
+            else:
+                index = self._child_page_index(parent_page_id)
+                if mode == "mnemonic":
                     # Match only if segment equals computed mnemonic (no exact title fallback)
-                    page_mn = compute_mnemonic(title)
-                    if page_mn == seg_upper:
-                        logger.info("Found child page by computed mnemonic '%s' (title='%s') with id %s", page_mn, title, page_id)
-                        return page_id
-                elif mode == "prefix":
-                    # Match only if normalized title starts with normalized segment (symbols ignored, case-insensitive)
-                    # Do not match when the normalized segment equals the full normalized title (i.e., exact title)
-                    title_norm = norm(title)
-                    if seg_norm and title_norm.startswith(seg_norm) and title_norm != seg_norm:
-                        logger.info("Found child page by prefix match: segment '%s' matches title '%s' (id=%s)", segment, title, page_id)
-                        return page_id
+                    hit = index.get(seg_upper)
+                    if hit:
+                        logger.info("Found child page by computed mnemonic '%s' (title='%s') with id %s", seg_upper, hit[0], hit[1])
+                        return hit[1]
                 else:
-                    # Unknown mode: fallback to exact only behavior
-                    if title.casefold() == seg_cf:
-                        logger.info("Found child page by exact title '%s' (case-insensitive, unknown mode) with id %s", title, page_id)
-                        return page_id
+                    # Only exact case-insensitive title match (also the fallback for unknown modes)
+                    hit = index.get(seg_cf)
+                    if hit:
+                        logger.info("Found child page by exact title '%s' (case-insensitive) with id %s", hit[0], hit[1])
+                        return hit[1]
 
             logger.info("Child page for segment '%s' not found under %s", segment, parent_page_id)
             return None
@@ -325,6 +475,7 @@ class NotionClient:
             # The returned page has an "id"
             new_id = resp["id"]
             logger.info("Created page '%s' with id %s", title, new_id)
+            self._record_child_page(parent_page_id, title, new_id)
             return new_id
 
     def get_metadata(self, page_id: str) -> Tuple[Optional[str], Optional[str]]:
@@ -336,7 +487,8 @@ class NotionClient:
             logger.info("Skipping metadata read for database root %s", page_id)
             return None, None
         try:
-            page = self.client.pages.retrieve(page_id=page_id)
+            # Type detection has usually just fetched this page; properties only change through set_metadata
+            page = self._retrieved_pages.pop(page_id, None) or self.client.pages.retrieve(page_id=page_id)
             props = page.get("properties", {}) or {}
 
             def _get_prop_text(prop_name: str) -> Optional[str]:
@@ -375,6 +527,7 @@ class NotionClient:
         Database roots do not support page properties, so writes are skipped.
         """
         logger.info("Setting metadata on %s", page_id)
+        self._retrieved_pages.pop(page_id, None)
         if self._detect_parent_type(page_id) == "database":
             logger.info("Skipping metadata write for database root %s", page_id)
             return
@@ -398,20 +551,61 @@ class NotionClient:
             else:
                 raise
 
+    def _delete_block(self, block_id: str) -> None:
+        self.client.blocks.delete(block_id=block_id)  # archive block
+
+    def prefetch_pages(self, page_ids: List[str]) -> None:
+        """Retrieve pages concurrently ahead of a traversal.
+        Type detection and the next get_metadata of each page then use the fetched page
+        instead of sending their own request. Failures are left to those later calls."""
+        todo = [
+            pid for pid in page_ids
+            if pid not in self._retrieved_pages and self._parent_type_cache.get(pid) != "database"
+        ]
+        if len(todo) < 2:
+            # A single page is fetched on demand just as fast
+            return
+
+        def fetch(page_id: str) -> None:
+            try:
+                page = self.client.pages.retrieve(page_id=page_id)
+            except Exception as e:
+                logger.debug("Prefetch of %s failed, it will be retrieved on demand: %s", page_id, e)
+                return
+            self._retrieved_pages[page_id] = page
+            self._parent_type_cache[page_id] = "page"
+
+        logger.info("Prefetching %d pages", len(todo))
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(todo))) as pool:
+            list(pool.map(fetch, todo))
+
     def clear_page_content(self, page_id: str) -> int:
         """Remove all non-child-page blocks from a page. Returns count of child pages found."""
         logger.info("Clearing content from %s", page_id)
-        removed = 0
-        child_pages = 0
+        to_delete: List[str] = []
+        kept: List[dict] = []
         for blk in self.list_children(page_id):
             btype = blk.get("type")
             # Do NOT delete child pages or child databases; only remove content blocks
             if btype in {"child_page", "child_database"}:
-                child_pages += 1
+                kept.append(blk)
                 continue
-            self.client.blocks.delete(block_id=blk["id"])  # archive block
-            removed += 1
-        logger.info("Removed %d blocks (found %d child pages) from %s", removed, child_pages, page_id)
+            to_delete.append(blk["id"])
+        child_pages = len(kept)
+        if to_delete:
+            try:
+                # Deletions are independent network calls; overlap their round-trips
+                with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(to_delete))) as pool:
+                    list(pool.map(self._delete_block, to_delete))
+            except BaseException:
+                # Some blocks may already be gone; list the page again next time
+                self._invalidate_children(page_id)
+                raise
+            # Only the preserved blocks are left, in their original order. The title index still holds;
+            # the prefix index records positions in the old listing, so it is rebuilt on demand
+            self._children_cache[page_id] = kept
+            self._child_prefix_cache.pop(page_id, None)
+        logger.info("Removed %d blocks (found %d child pages) from %s", len(to_delete), child_pages, page_id)
         return child_pages
 
     def append_page_content(self, page_id: str, markdown_text: str, source_files: Optional[List[str]] = None, has_children: bool = False) -> None:
@@ -524,11 +718,10 @@ class NotionClient:
         # Append blocks if there are any
         if blocks:
             logger.info("Appending %d blocks to %s", len(blocks), page_id)
-            # Append sequentially to properly handle table blocks (need to append rows under the created table)
-            appended = 0
-            for idx, block in enumerate(blocks):
-                btype = block.get("type")
-                if btype == "table":
+            self._invalidate_children(page_id)
+            # Tables carry their rows nested, like list items with their children; everything is batched
+            for block in blocks:
+                if block.get("type") == "table":
                     # Extract table rows and embed them under table.children per API validation error
                     rows = block.pop("children", []) or []
                     tbl = block.get("table", {}) or {}
@@ -543,23 +736,6 @@ class NotionClient:
                     # Attach rows under table.children as required by the API
                     tbl["children"] = rows
                     block["table"] = tbl
-                    # Append table with its rows in a single request
-                    self.client.blocks.children.append(block_id=page_id, children=[block])
-                    appended += 1
-                elif btype == "bulleted_list_item":
-                    # Handle nested list items: extract children and append separately
-                    nested_children = block.pop("children", None)
-                    # Append the parent list item without children
-                    resp = self.client.blocks.children.append(block_id=page_id, children=[block])
-                    appended += 1
-                    # If there are nested children, append them to the newly created block
-                    if nested_children:
-                        created_block_id = resp.get("results", [{}])[0].get("id")
-                        if created_block_id:
-                            self._append_nested_blocks(created_block_id, nested_children)
-                else:
-                    # Append non-table blocks directly
-                    self.client.blocks.children.append(block_id=page_id, children=[block])
-                    appended += 1
+            self._append_nested_blocks(page_id, blocks)
             # Note: Official API doesn't provide reliable child block reordering across types; subpages may precede text.
-            logger.info("Content appended to %s: %d top-level block(s) appended (tables handled with separate row appends)", page_id, appended)
+            logger.info("Content appended to %s: %d top-level block(s) appended", page_id, len(blocks))
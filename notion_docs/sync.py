@@ -1,15 +1,32 @@
 import hashlib
 import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
 
 from .notion_api import NotionClient  
 
 from .models import BlockComment
 from .config import AppConfig
+from .cache import PageCache, load_cache, save_cache
 
 logger = logging.getLogger(__name__)
 
+# Sibling subtrees touch disjoint pages, so up to this many are synced at the same time
+SYNC_WORKERS = 4
+
+# Prefix of stored subtree hashes, naming how they are computed. Hashes written by older
+# versions (no prefix) never match, so the first sync after a change rewrites metadata once.
+SUBTREE_HASH_VERSION = "v2"
+# Hash of empty input: the text hash of undocumented ancestors
+_EMPTY_HASH = hashlib.sha256(b"").hexdigest()
+# Combined texts at least this long are hashed on a thread pool (hashlib releases the GIL for large
+# inputs); shorter ones are cheaper to hash inline than to hand over to a worker
+PARALLEL_HASH_MIN_CHARS = 1 << 16
+HASH_WORKERS = os.cpu_count() or 1
+
 
 @dataclass
 class PageState:
@@ -19,6 +36,23 @@ class PageState:
     source_files: List[str]
 
 
+def _merkle_hash(children: Iterable[Tuple[str, str]]) -> str:
+    """Combine the (text_hash, subtree_hash) pairs of a node's direct children, in crumb order.
+    Any change below the node changes the result, while each node only hashes its own fanout."""
+    h = hashlib.sha256()
+    for text_hash, subtree_hash in children:
+        h.update(f"{text_hash}{subtree_hash}\n".encode("ascii"))
+    return f"{SUBTREE_HASH_VERSION}:{h.hexdigest()}"
+
+
+# Subtree hash of a page without child pages
+_EMPTY_SUBTREE_HASH = _merkle_hash(())
+
+
+def _hash_text(txt: str) -> str:
+    return hashlib.sha256(txt.encode("utf-8")).hexdigest() if txt else _EMPTY_HASH
+
+
 def _aggregate_comments(comments: List[BlockComment]) -> Dict[Tuple[str, ...], PageState]:
     # Combine texts for identical breadcrumbs in deterministic order (by file_path then text)
     logger.info("Aggregating %d comments by breadcrumb", len(comments))
@@ -49,22 +83,30 @@ def _aggregate_comments(comments: List[BlockComment]) -> Dict[Tuple[str, ...], P
             combined_text[crumb] = ""
             source_files_by_crumb[crumb] = []
 
-    combined_text_hash: Dict[Tuple[str, ...], str] = {
-        crumb: hashlib.sha256(txt.encode("utf-8")).hexdigest()
-        for crumb, txt in combined_text.items()
-    }
+    combined_text_hash: Dict[Tuple[str, ...], str] = {}
+    large = [crumb for crumb, txt in combined_text.items() if len(txt) >= PARALLEL_HASH_MIN_CHARS]
+    if len(large) > 1 and HASH_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=min(HASH_WORKERS, len(large))) as ex:
+            combined_text_hash.update(zip(large, ex.map(_hash_text, [combined_text[crumb] for crumb in large])))
+    for crumb, txt in combined_text.items():
+        if crumb not in combined_text_hash:
+            combined_text_hash[crumb] = _hash_text(txt)
 
-    # Compute subtree hashes: for each crumb, SHA256 of newline-joined strict descendant combined text hashes
-    subtree_hash: Dict[Tuple[str, ...], str] = {}
+    # Compute subtree hashes bottom-up: a crumb's hash covers its strict descendants (not its own text)
+    # by combining the hashes of its direct children, whose hashes are already known
     all_crumbs = sorted(all_crumbs_set)
+    children_map: Dict[Tuple[str, ...], List[Tuple[str, ...]]] = {}
     for crumb in all_crumbs:
-        descendant_hashes: List[Tuple[Tuple[str, ...], str]] = []
-        for other, h in combined_text_hash.items():
-            if len(crumb) < len(other) and list(crumb) == list(other[: len(crumb)]):
-                descendant_hashes.append((other, h))
-        descendant_hashes.sort(key=lambda x: x[0])
-        joined = "\n".join(h for _, h in descendant_hashes)
-        subtree_hash[crumb] = hashlib.sha256(joined.encode("utf-8")).hexdigest()
+        if crumb:
+            children_map.setdefault(crumb[:-1], []).append(crumb)
+    subtree_hash: Dict[Tuple[str, ...], str] = {}
+    # Descendants sort after their ancestors, so reversed order visits children first
+    for crumb in reversed(all_crumbs):
+        child_crumbs = children_map.get(crumb)
+        if child_crumbs is None:
+            subtree_hash[crumb] = _EMPTY_SUBTREE_HASH
+        else:
+            subtree_hash[crumb] = _merkle_hash((combined_text_hash[c], subtree_hash[c]) for c in child_crumbs)
 
     logger.info("Aggregated into %d breadcrumbs (including ancestors)", len(all_crumbs))
     return {
@@ -122,10 +164,38 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
     for k in children.keys():
         children[k].sort()
 
-    # Compute root subtree hash (hash of all top-level pages' subtree hashes)
+    # Compute root subtree hash from the top-level pages, the same way as for any other page
     top_level_crumbs = sorted(children.get(tuple(), []))
-    root_subtree_data = "\n".join(pages[crumb].subtree_hash for crumb in top_level_crumbs)
-    root_subtree_hash = hashlib.sha256(root_subtree_data.encode("utf-8")).hexdigest()
+    root_subtree_hash = _merkle_hash((pages[crumb].text_hash, pages[crumb].subtree_hash) for crumb in top_level_crumbs)
+
+    # Metadata written by previous runs, if a local cache is configured; --force ignores it
+    cache_path = getattr(config, 'metadata_cache', None)
+    page_cache: PageCache = load_cache(cache_path, config.root_page_id) if cache_path else {}
+    # Sibling subtrees update the cache from several threads
+    cache_lock = threading.Lock()
+
+    ensured: Dict[Tuple[str, ...], str] = {tuple(): config.root_page_id}
+    # Pages created during this run: they start without content, child pages or metadata
+    created: Set[str] = set()
+
+    def cached_unchanged(crumb: Tuple[str, ...], text_hash: str, subtree_hash: str) -> bool:
+        cached = page_cache.get(crumb)
+        if force or cached is None or cached[1] != text_hash or cached[2] != subtree_hash:
+            return False
+        # The entry only describes the page it was written for, not one created (again) in this run
+        page_id = ensured.get(crumb)
+        return page_id is None or (page_id not in created and page_id == cached[0])
+
+    def record_created(crumb: Tuple[str, ...], page_id: str) -> None:
+        created.add(page_id)
+        # A recreated page starts empty: cached entries for it and its descendants no longer hold
+        with cache_lock:
+            for key in [k for k in page_cache if k[:len(crumb)] == crumb]:
+                del page_cache[key]
+
+    if cached_unchanged(tuple(), "", root_subtree_hash):
+        logger.info("Root subtree unchanged since the last sync (metadata cache), nothing to do")
+        return
 
     # Check root page hash first - skip everything if unchanged
     existing_root_text_hash, existing_root_subtree_hash = client.get_metadata(config.root_page_id)
@@ -133,8 +203,6 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
         logger.info("Root subtree unchanged, nothing to do")
         return
 
-    ensured: Dict[Tuple[str, ...], str] = {tuple(): config.root_page_id}
-
     def ensure_page(parent_id: str, crumb: Tuple[str, ...]) -> str:
         title = crumb[-1]
         logger.info("Ensuring page for crumb '%s' (parent path len=%d)", title, len(crumb) - 1)
@@ -142,10 +210,14 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
         if not child_id:
             logger.info("Page '%s' not found under parent %s, creating it", title, parent_id)
             child_id = client.create_child_page(parent_id, title)
+            record_created(crumb, child_id)
         logger.info("Ensured page '%s' -> id=%s", " / ".join(crumb), child_id)
         return child_id
 
     def process_node(parent_id: str, crumb: Tuple[str, ...]) -> None:
+        if cached_unchanged(crumb, pages[crumb].text_hash, pages[crumb].subtree_hash):
+            logger.info("Page '%s' and its subtree unchanged since the last sync (metadata cache); skipping", " / ".join(crumb))
+            return
         # Ensure current page exists
         page_id = ensured.get(crumb)
         if not page_id:
@@ -153,20 +225,24 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
             ensured[crumb] = page_id
         state = pages[crumb]
         child_crumbs = children.get(crumb, [])
+        is_new = page_id in created
 
         # Check which child pages need to be created (don't exist yet)
         new_children = []
         for child_crumb in child_crumbs:
             if child_crumb not in ensured:
                 title = child_crumb[-1]
-                existing_id = client.find_child_page(page_id, title)
+                existing_id = None if is_new else client.find_child_page(page_id, title)
                 if existing_id:
                     ensured[child_crumb] = existing_id
                 else:
                     new_children.append(child_crumb)
 
         # Check if we need to update content
-        existing_text_hash, existing_subtree_hash = client.get_metadata(page_id)
+        if is_new:
+            existing_text_hash, existing_subtree_hash = None, None
+        else:
+            existing_text_hash, existing_subtree_hash = client.get_metadata(page_id)
         need_content = force or (existing_text_hash != state.text_hash) or bool(new_children)
         need_meta = force or (existing_text_hash != state.text_hash) or (existing_subtree_hash != state.subtree_hash)
 
@@ -174,13 +250,14 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
         # This ensures new child pages appear at the top (after existing child pages)
         if need_content:
             logger.info("Updating content for page '%s' (id=%s)", " / ".join(crumb), page_id)
-            existing_children = client.clear_page_content(page_id)
+            existing_children = 0 if is_new else client.clear_page_content(page_id)
             has_children = existing_children > 0 or bool(child_crumbs)
             # Now create new child pages (they will appear after existing child pages)
             for child_crumb in new_children:
                 title = child_crumb[-1]
                 child_id = client.create_child_page(page_id, title)
                 ensured[child_crumb] = child_id
+                record_created(child_crumb, child_id)
             # Append content after child pages
             client.append_page_content(page_id, state.text, state.source_files, has_children=has_children)
         else:
@@ -191,8 +268,9 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
                 logger.info("Force enabled; processing all subpages for '%s' (id=%s)", " / ".join(crumb), page_id)
             else:
                 logger.info("Subtree changed for page '%s' (id=%s); processing subpages", " / ".join(crumb), page_id)
-            for child_crumb in child_crumbs:
-                process_node(page_id, child_crumb)
+            # Every child is ensured by now; fetch their pages concurrently before visiting them one by one
+            client.prefetch_pages([ensured[c] for c in child_crumbs if c in ensured and ensured[c] not in created])
+            process_children(page_id, child_crumbs)
         else:
             logger.info("Subtree unchanged for page '%s' (id=%s); skipping checks/ensures for subpages", " / ".join(crumb), page_id)
         # After updating content and any subpages, update metadata if needed
@@ -201,13 +279,47 @@ def sync_to_notion(config: AppConfig, comments: List[BlockComment], dry_run: boo
             client.set_metadata(page_id, state.text_hash, state.subtree_hash)
         else:
             logger.info("Metadata up-to-date for page '%s' (id=%s)", " / ".join(crumb), page_id)
+        with cache_lock:
+            page_cache[crumb] = (page_id, state.text_hash, state.subtree_hash)
+
+    def process_children(parent_id: str, child_crumbs: List[Tuple[str, ...]]) -> None:
+        # Siblings run on the pool; the caller takes the first one and any sibling no worker has
+        # started yet, so a node never blocks on queued work and nested levels cannot deadlock
+        futures: List[Tuple[Tuple[str, ...], Future]] = [
+            (c, pool.submit(process_node, parent_id, c)) for c in child_crumbs[1:]
+        ]
+        try:
+            if child_crumbs:
+                process_node(parent_id, child_crumbs[0])
+            for child_crumb, future in futures:
+                if future.cancel():
+                    process_node(parent_id, child_crumb)
+                else:
+                    future.result()
+        except BaseException:
+            for _, future in futures:
+                future.cancel()
+            raise
+
+    try:
+        # Ensure top-level pages one by one, so they are created in order under the root
+        for top in top_level_crumbs:
+            if top not in ensured:
+                ensured[top] = ensure_page(config.root_page_id, top)
+        client.prefetch_pages([ensured[top] for top in top_level_crumbs if ensured[top] not in created])
 
-    # Start from top-level crumbs under the configured root
-    for top in top_level_crumbs:
-        process_node(config.root_page_id, top)
+        # Start from top-level crumbs under the configured root
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+            process_children(config.root_page_id, top_level_crumbs)
 
-    # Update root page metadata
-    logger.info("Updating root page metadata")
-    client.set_metadata(config.root_page_id, "", root_subtree_hash, ignore_errors=True)
+        # Update root page metadata
+        logger.info("Updating root page metadata")
+        client.set_metadata(config.root_page_id, "", root_subtree_hash, ignore_errors=True)
+        with cache_lock:
+            page_cache[tuple()] = (config.root_page_id, "", root_subtree_hash)
+    finally:
+        # Keep the progress of partial runs too: pages recorded so far are in sync
+        if cache_path:
+            save_cache(cache_path, config.root_page_id, page_cache)
 
     logger.info("Sync to Notion completed for %d pages", len(pages))
@@ -118,4 +118,15 @@ def test_blockquote_with_link():
     link_segment = next((seg for seg in rich_text if seg.get("text", {}).get("link")), None)
     assert link_segment is not None
     assert link_segment["text"]["link"]["url"] == "https://example.com"
-    assert link_segment["text"]["content"] == "link"
\ No newline at end of file
+    assert link_segment["text"]["content"] == "link"
+
+
+def test_nested_blockquote_stays_in_one_quote():
+    """Test that text after a nested quote still belongs to the outer quote"""
+    markdown = "> a\n>\n> > b\n>\n> c"
+    blocks = markdown_to_blocks(markdown)
+
+    assert len(blocks) == 1
+    assert blocks[0]["type"] == "quote"
+    contents = [seg["text"]["content"] for seg in blocks[0]["quote"]["rich_text"]]
+    assert contents == ["a", "\n", "b", "\n", "c"]
@@ -0,0 +1,30 @@
+import json
+
+from notion_docs.cache import load_cache, save_cache
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = {
+        tuple(): ("root", "", "s0"),
+        ("Service", "API"): ("page-2", "t2", "s2"),
+    }
+    save_cache(path, "root", cache)
+    assert load_cache(path, "root") == cache
+    assert not (tmp_path / "cache.json.tmp").exists()
+
+
+def test_cache_for_other_root_or_version_is_ignored(tmp_path):
+    path = tmp_path / "cache.json"
+    assert load_cache(str(path), "root") == {}
+
+    save_cache(str(path), "root", {("A",): ("page-1", "t1", "s1")})
+    assert load_cache(str(path), "other-root") == {}
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["version"] = 0
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert load_cache(str(path), "root") == {}
+
+    path.write_text("{not json", encoding="utf-8")
+    assert load_cache(str(path), "root") == {}
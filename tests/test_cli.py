@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from notion_docs import cli
+from notion_docs.cli import run, SUPPORTED_EXTENSIONS
+
+
+def write(p: Path, content: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(content, encoding="utf-8")
+
+
+def test_run_parallel_matches_sequential(tmp_path, monkeypatch):
+    root = Path(tmp_path)
+    for i in range(40):
+        write(root / f"pkg{i % 4}" / f"F{i:02d}.kt", f"/* NOTION.Page{i % 5}#{i}\n * Body {i}\n */\nval x = {i}\n")
+    write(root / "ignored.txt", "/* NOTION.Ignored */")
+
+    monkeypatch.setattr(cli, "PARALLEL_MIN_FILES", 10**6)
+    sequential = run(str(root), SUPPORTED_EXTENSIONS)
+    monkeypatch.setattr(cli, "PARALLEL_MIN_FILES", 1)
+    parallel = run(str(root), SUPPORTED_EXTENSIONS)
+
+    assert len(sequential) == 40
+    assert parallel == sequential
+
+
+def test_run_pipeline_matches_sequential(tmp_path, monkeypatch):
+    root = Path(tmp_path)
+    for i in range(20):
+        write(root / f"F{i:02d}.kt", f"/* NOTION.Page{i % 3}\n * Body {i}\n */\n")
+
+    sequential = run(str(root), SUPPORTED_EXTENSIONS)
+    monkeypatch.setattr(cli, "PARALLEL_MIN_FILES", 1)
+    monkeypatch.setattr(cli, "PIPELINE_BATCH", 7)
+    monkeypatch.setenv(cli.PIPELINE_ENV, "1")
+    assert run(str(root), SUPPORTED_EXTENSIONS) == sequential
+
+
+def test_block_comment_to_dict_matches_asdict():
+    from dataclasses import asdict
+    from notion_docs.models import BlockComment
+
+    c = BlockComment(file_path="A.kt", text="t", breadcrumb=["A"], sort_index=2, text_hash="h", options={"include_all": True})
+    assert c.to_dict() == asdict(c)
+    assert list(c.to_dict()) == list(asdict(c))
+
+
+def test_print_results_json_streams_same_output(capsys):
+    import json
+    from notion_docs.cli import print_results
+    from notion_docs.models import BlockComment
+
+    results = [
+        BlockComment(file_path="A.kt", text="line 1\nline 2", breadcrumb=["A", "B"], options={"include_all": True}),
+        BlockComment(file_path="B.kt", text="àè", breadcrumb=["C"], sort_index=3),
+    ]
+    for items in (results, []):
+        print_results(items, as_json=True)
+        expected = json.dumps([r.to_dict() for r in items], ensure_ascii=False, indent=2) + "\n"
+        assert capsys.readouterr().out == expected
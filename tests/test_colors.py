@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import pytest
 
 from notion_docs.markdown_to_notion import markdown_to_blocks
@@ -94,4 +96,92 @@ def test_background_colors():
     quote = blocks[1]
     assert quote["quote"]["color"] == "gray_background"
     for segment in quote["quote"]["rich_text"]:
-        assert segment["annotations"]["color"] == "gray_background"
\ No newline at end of file
+        assert segment["annotations"]["color"] == "gray_background"
+
+
+def test_plain_text_paragraph():
+    """Test that plain text becomes one default-annotated segment while markup is still parsed"""
+    blocks = markdown_to_blocks("Just a sentence: nothing to format here.", quote_color="red", inline_code_color="blue")
+    assert blocks == [{
+        "type": "paragraph",
+        "paragraph": {"rich_text": [{
+            "type": "text",
+            "text": {"content": "Just a sentence: nothing to format here."},
+            "annotations": {
+                "bold": False, "italic": False, "strikethrough": False,
+                "underline": False, "code": False, "color": "default",
+            },
+        }]},
+    }]
+
+    assert markdown_to_blocks("- item")[0]["type"] == "bulleted_list_item"
+    assert markdown_to_blocks("    indented")[0]["type"] == "code"
+    assert markdown_to_blocks("Tom &amp; Jerry")[0]["paragraph"]["rich_text"][0]["text"]["content"] == "Tom & Jerry"
+
+
+def test_markdown_to_blocks_many_matches_single_conversions(monkeypatch):
+    from notion_docs import markdown_to_notion
+
+    docs = [f"# Title {i}\n\nText with `code {i}`\n\n> quote" for i in range(6)]
+    expected = [markdown_to_blocks(md, quote_color="gray", inline_code_color="red") for md in docs]
+    # Repeats and already cached documents are served without the worker pool
+    docs += [docs[0], "Plain line", docs[0]]
+    expected += [expected[0], markdown_to_blocks("Plain line"), expected[0]]
+
+    # Only the second document stays cached; the others go through the worker pool
+    key = (docs[1], "gray", "red")
+    monkeypatch.setattr(markdown_to_notion, "_BLOCKS_CACHE", OrderedDict([(key, markdown_to_notion._BLOCKS_CACHE[key])]))
+    monkeypatch.setattr(markdown_to_notion, "PARALLEL_MIN_DOCS", 1)
+    many = markdown_to_notion.markdown_to_blocks_many(docs, quote_color="gray", inline_code_color="red", workers=2)
+    assert many == expected
+    assert many[0] is not many[6]
+    assert all((md, "gray", "red") in markdown_to_notion._BLOCKS_CACHE for md in docs[:6])
+
+
+def test_adjacent_segments_with_same_formatting_are_merged():
+    """Test that runs rendering identically end up in one segment"""
+    rich_text = markdown_to_blocks("[a](https://x.com)[b](https://x.com) and <b>c</b> **d** e")[0]["paragraph"]["rich_text"]
+    assert [(seg["text"]["content"], seg["text"].get("link"), seg["annotations"]["bold"]) for seg in rich_text] == [
+        ("ab", {"url": "https://x.com"}, False),
+        (" and c ", None, False),
+        ("d", None, True),
+        (" e", None, False),
+    ]
+
+
+def test_long_code_block_is_split_into_rich_text_items():
+    """Test that code longer than Notion's rich_text limit is spread over several items"""
+    from notion_docs.markdown_to_notion import RICH_TEXT_MAX_CHARS
+
+    code = "\n".join(f"val line{i} = {i}" for i in range(400))
+    block = markdown_to_blocks(f"```kotlin\n{code}\n```")[0]
+    pieces = [seg["text"]["content"] for seg in block["code"]["rich_text"]]
+    assert len(pieces) > 1
+    assert all(len(p) <= RICH_TEXT_MAX_CHARS for p in pieces)
+    assert "".join(pieces) == code
+
+
+def test_long_code_block_split_counts_utf16_code_units():
+    """Test that characters outside the BMP count twice towards Notion's rich_text limit"""
+    from notion_docs.markdown_to_notion import RICH_TEXT_MAX_CHARS
+
+    code = "\U0001F600" * 1500
+    block = markdown_to_blocks(f"```\n{code}\n```")[0]
+    pieces = [seg["text"]["content"] for seg in block["code"]["rich_text"]]
+    assert len(pieces) == 2
+    assert all(len(p.encode("utf-16-le")) // 2 <= RICH_TEXT_MAX_CHARS for p in pieces)
+    assert "".join(pieces) == code
+
+
+def test_blocks_cache_is_safe_across_threads(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from notion_docs import markdown_to_notion
+
+    # A tiny cache makes threads evict entries that others are looking up
+    monkeypatch.setattr(markdown_to_notion, "_BLOCKS_CACHE", OrderedDict())
+    monkeypatch.setattr(markdown_to_notion, "_BLOCKS_CACHE_SIZE", 2)
+    docs = [f"# Doc {i % 5}\n\n`code`" for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(markdown_to_blocks, docs))
+    assert all(blocks[0]["heading_1"]["rich_text"][0]["text"]["content"] == f"Doc {i % 5}" for i, blocks in enumerate(results))
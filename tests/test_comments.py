@@ -78,7 +78,7 @@ fun main() {
 
 
 def test_extract_block_comments_from_text_normalization():
-    bodies = extract_block_comments_from_text(SAMPLE_KOTLIN, lang="kotlin")
+    bodies = list(extract_block_comments_from_text(SAMPLE_KOTLIN, lang="kotlin"))
 
     assert len(bodies) == 13
     assert bodies[0] == "COMMENT 1"
@@ -143,4 +143,32 @@ def test_parse_breadcrumb_with_options():
         assert result == expected, f"Failed for: {body}"
 
 
-
+def test_extract_block_comments_skips_strings_and_line_comments():
+    source = '''
+// a line comment with /* no block */
+val s = "/* inside a string */"
+val c = '"'
+val raw = """ /* inside a raw string */ """
+/* NOTION.A
+ * Body
+ */
+'''
+    for lang in ("kotlin", "java"):
+        assert list(extract_block_comments_from_text(source, lang=lang)) == ["NOTION.A\nBody"]
+
+
+def test_extract_block_comments_skips_kotlin_backtick_identifiers():
+    source = '''
+fun `handles /* and " in names`() = Unit
+fun `it's fine`() = Unit
+/* NOTION.A
+ * Body
+ */
+'''
+    assert list(extract_block_comments_from_text(source, lang="kotlin")) == ["NOTION.A\nBody"]
+
+
+def test_extract_block_comments_only_notion():
+    bodies = list(extract_block_comments_from_text(SAMPLE_KOTLIN, lang="kotlin", only_notion=True))
+    assert bodies == [b for b in extract_block_comments_from_text(SAMPLE_KOTLIN, lang="kotlin") if "NOTION" in b]
+    assert list(extract_block_comments_from_text("/* plain */ val x = 1", lang="kotlin", only_notion=True)) == []
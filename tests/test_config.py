@@ -71,3 +71,36 @@ def test_missing_api_key_raises(tmp_path, monkeypatch):
         load_config(str(cfg_path))
 
 
+def test_reload_picks_up_config_changes(tmp_path, monkeypatch):
+    cfg_path = tmp_path / "notion-docs.yaml"
+    write_yaml(cfg_path, "root: ./\nroot_page_id: first\n")
+    monkeypatch.setenv("NOTION_API_KEY", "secret")
+    assert load_config(str(tmp_path)).root_page_id == "first"
+
+    write_yaml(cfg_path, "root: ./\nroot_page_id: second\n")
+    st = os.stat(cfg_path)
+    os.utime(cfg_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_config(str(tmp_path)).root_page_id == "second"
+
+
+def test_missing_config_in_dir_raises(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTION_API_KEY", "secret")
+    with pytest.raises(FileNotFoundError):
+        load_config(str(tmp_path))
+
+
+def test_metadata_cache_is_resolved_relative_to_config(tmp_path, monkeypatch):
+    cfg_path = tmp_path / "notion-docs.yaml"
+    write_yaml(
+        cfg_path,
+        """
+        root: ./
+        root_page_id: root-page
+        metadata_cache: .notion-docs-cache.json
+        """,
+    )
+    monkeypatch.setenv("NOTION_API_KEY", "secret-key")
+
+    assert load_config(str(cfg_path)).metadata_cache == str(tmp_path / ".notion-docs-cache.json")
+    write_yaml(cfg_path, "root: ./\nroot_page_id: root-page\n")
+    assert load_config(str(cfg_path)).metadata_cache is None
@@ -5,6 +5,10 @@ import hashlib
 from notion_docs.files import iter_source_files, extract_block_comments_from_file
 
 
+def fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def write(p: Path, content: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(content, encoding="utf-8")
@@ -68,20 +72,20 @@ def test_iter_and_extract_only_notion(tmp_path):
     # Validate hashes for each
     text_A, text_hash_A, subtree_hash_A = by_crumb[("A",)]
     assert text_A == "Hello from A"
-    assert text_hash_A == hashlib.sha256(text_A.encode("utf-8")).hexdigest()
+    assert text_hash_A == fingerprint(text_A)
 
     text_BC, text_hash_BC, subtree_hash_BC = by_crumb[("A", "B C")]
     assert text_BC == ""
-    assert text_hash_BC == hashlib.sha256(text_BC.encode("utf-8")).hexdigest()
+    assert text_hash_BC == fingerprint(text_BC)
 
-    # New subtree hash semantics: subtree hash is SHA-256 of newline-joined text hashes of strict descendants (excluding self)
-    # For a leaf like A.B C, there are no descendants, so it's SHA-256 of an empty string
-    expected_subtree_BC = hashlib.sha256(b"").hexdigest()
+    # New subtree hash semantics: subtree hash is the fingerprint of newline-joined text hashes of strict descendants (excluding self)
+    # For a leaf like A.B C, there are no descendants, so it's the fingerprint of an empty string
+    expected_subtree_BC = fingerprint("")
     assert subtree_hash_BC == expected_subtree_BC
 
     # With cross-file subtree, A should include its strict descendants across all files.
-    # The only descendant is A.B C found in nested/B.kts, so subtree(A) = SHA256(text_hash_BC)
-    expected_subtree_A = hashlib.sha256(text_hash_BC.encode("utf-8")).hexdigest()
+    # The only descendant is A.B C found in nested/B.kts, so subtree(A) = fingerprint(text_hash_BC)
+    expected_subtree_A = fingerprint(text_hash_BC)
     assert subtree_hash_A == expected_subtree_A
 
 
@@ -146,19 +150,19 @@ def test_duplicate_breadcrumb_texts_get_appended(tmp_path):
     ab_texts = [c.text for c in comments_AB]
     assert ab_texts == ["Part1", "Part2", "Part3"]
     for c in comments_AB:
-        assert c.text_hash == hashlib.sha256(c.text.encode("utf-8")).hexdigest()
+        assert c.text_hash == fingerprint(c.text)
 
     # Combined text for crumb (A,B) is appended with newlines in deterministic traversal order
     combined_ab_text = "\n".join(ab_texts)
-    combined_ab_hash = hashlib.sha256(combined_ab_text.encode("utf-8")).hexdigest()
+    combined_ab_hash = fingerprint(combined_ab_text)
 
     # Subtree(A) should be the hash of the combined hash of its strict descendant (A,B)
     a = comments_A[0]
-    expected_subtree_A = hashlib.sha256(combined_ab_hash.encode("utf-8")).hexdigest()
+    expected_subtree_A = fingerprint(combined_ab_hash)
     assert a.subtree_hash == expected_subtree_A
 
     # A.B has no strict descendants, so subtree is empty-string hash
-    empty_hash = hashlib.sha256(b"").hexdigest()
+    empty_hash = fingerprint("")
     for c in comments_AB:
         assert c.subtree_hash == empty_hash
 
@@ -272,3 +276,69 @@ def test_include_all_with_multiple_tags(tmp_path):
     assert comment_C.text == "Content C"
     assert "Comment after C" not in comment_C.text
 
+
+def test_iter_source_files_matches_sorted_walk(tmp_path):
+    import os
+
+    root = Path(tmp_path)
+    for rel in ["b.kt", "a.java", "z/y.php", "z/a/x.md", "c/d.kts", "c/skip.txt", "b/e.kt"]:
+        write(root / rel, "")
+
+    expected = []
+    for dirpath, dirnames, filenames in os.walk(str(root)):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1] in {".java", ".kt", ".kts", ".php", ".md"}:
+                expected.append(os.path.join(dirpath, filename))
+
+    assert list(iter_source_files(str(root))) == expected
+
+
+def test_tree_cache_invalidated_when_sibling_changes(tmp_path):
+    import os
+
+    root = Path(tmp_path)
+    write(root / "A.kt", "/* NOTION.A\n * Parent\n */")
+    write(root / "B.kt", "/* NOTION.A.B\n * Child\n */")
+
+    before = extract_block_comments_from_file(str(root / "A.kt"))[0].subtree_hash
+    assert extract_block_comments_from_file(str(root / "A.kt"))[0].subtree_hash == before
+
+    write(root / "B.kt", "/* NOTION.A.B\n * Child changed\n */")
+    st = os.stat(root / "B.kt")
+    os.utime(root / "B.kt", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    after = extract_block_comments_from_file(str(root / "A.kt"))[0].subtree_hash
+    assert after != before
+
+
+def test_read_source_file_decodes_like_text_mode(tmp_path):
+    from notion_docs.files import read_source_file
+
+    utf8 = Path(tmp_path) / "utf8.kt"
+    utf8.write_bytes("/* NOTION.Città */\r\nval x = 1\rval y = 2\n".encode("utf-8"))
+    assert read_source_file(str(utf8)) == "/* NOTION.Città */\nval x = 1\nval y = 2\n"
+
+    latin1 = Path(tmp_path) / "latin1.kt"
+    latin1.write_bytes("/* NOTION.Città */\n".encode("latin-1"))
+    assert read_source_file(str(latin1)) == "/* NOTION.Città */\n"
+
+
+def test_parallel_tree_scan_matches_sequential(tmp_path, monkeypatch):
+    from notion_docs import files
+
+    def build(root: Path) -> List[Tuple[List[str], str, str, str]]:
+        for i in range(24):
+            write(root / f"F{i:02d}.kt", f"/* NOTION.Page{i % 4}.Sub{i}\n * Body {i}\n */\n")
+        write(root / "Main.kt", "/* NOTION.Page1\n * Main\n */\n")
+        return [
+            (c.breadcrumb, c.text, c.text_hash, c.subtree_hash)
+            for c in extract_block_comments_from_file(str(root / "Main.kt"))
+        ]
+
+    monkeypatch.setattr(files, "PARALLEL_COLLECT_MIN_FILES", 10**6)
+    sequential = build(Path(tmp_path) / "seq")
+    monkeypatch.setattr(files, "PARALLEL_COLLECT_MIN_FILES", 1)
+    parallel = build(Path(tmp_path) / "par")
+
+    assert parallel == sequential
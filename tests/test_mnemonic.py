@@ -25,3 +25,10 @@ from notion_docs.mnemonic import compute_mnemonic
 )
 def test_compute_mnemonic(title: str, expected: str):
     assert compute_mnemonic(title) == expected
+
+
+def test_compute_mnemonic_is_memoized():
+    compute_mnemonic.cache_clear()
+    assert compute_mnemonic("Payment Service") == compute_mnemonic("Payment Service") == "PYM"
+    info = compute_mnemonic.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
@@ -104,4 +104,22 @@ def test_mixed_content_with_nested_lists():
 
     # Check second top-level item has no children
     assert blocks[1]["bulleted_list_item"]["rich_text"][0]["text"]["content"] == "Second top-level item"
-    assert "children" not in blocks[1]
\ No newline at end of file
+    assert "children" not in blocks[1]
+
+
+def test_ordered_list_inside_bullet_item_is_not_split():
+    """Test that an ordered list nested in a bullet item does not leak items to the outer list"""
+    markdown = "- a\n  1. b\n  2. c\n- d"
+    blocks = markdown_to_blocks(markdown)
+
+    assert [b["bulleted_list_item"]["rich_text"][0]["text"]["content"] for b in blocks] == ["a", "d"]
+
+
+def test_repeated_conversion_returns_independent_blocks():
+    """Test that detaching children from one result does not affect later conversions"""
+    markdown = "- Parent\n  - Child"
+    first = markdown_to_blocks(markdown)
+    first[0].pop("children")
+
+    second = markdown_to_blocks(markdown)
+    assert second[0]["children"][0]["bulleted_list_item"]["rich_text"][0]["text"]["content"] == "Child"
@@ -37,3 +37,285 @@ def test_set_metadata_skips_database_root():
     client.set_metadata("db-root-id", "text-hash", "subtree-hash")
 
     assert client.client.pages.update_calls == []
+
+
+class _FakeChildren:
+    def __init__(self):
+        self.append_calls = []
+        self.payloads = []
+
+    def append(self, block_id, children):
+        self.append_calls.append((block_id, [b["type"] for b in children]))
+        self.payloads.append(children)
+        return {"results": [{"id": f"{block_id}/{i}"} for i in range(len(children))]}
+
+
+class _FakeBlocks:
+    def __init__(self):
+        self.children = _FakeChildren()
+
+
+def test_append_page_content_batches_blocks(monkeypatch):
+    from notion_docs import notion_api
+
+    monkeypatch.setattr(notion_api, "APPEND_BATCH_SIZE", 3)
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.blocks = _FakeBlocks()
+
+    md = "# Title\n\nText\n\n- a\n  - a1\n  - a2\n- b\n\nMore\n\n| h |\n|---|\n| 1 |\n\nEnd"
+    client.append_page_content("page", md)
+
+    assert client.client.blocks.children.append_calls == [
+        ("page", ["heading_1", "paragraph", "bulleted_list_item"]),
+        ("page", ["bulleted_list_item", "paragraph", "table"]),
+        ("page", ["paragraph"]),
+    ]
+    # Nested items and table rows travel inside their parent block
+    item = client.client.blocks.children.payloads[0][2]
+    assert "children" not in item
+    assert [c["type"] for c in item["bulleted_list_item"]["children"]] == ["bulleted_list_item"] * 2
+    assert [r["type"] for r in client.client.blocks.children.payloads[1][2]["table"]["children"]] == ["table_row"] * 2
+
+
+def test_append_page_content_detaches_children_nested_too_deep(monkeypatch):
+    from notion_docs import notion_api
+
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.blocks = _FakeBlocks()
+
+    client.append_page_content("page", "- a\n  - b\n    - c\n      - d")
+    assert client.client.blocks.children.append_calls == [
+        ("page", ["bulleted_list_item"]),
+        ("page/0", ["bulleted_list_item"]),
+    ]
+    b = client.client.blocks.children.payloads[1][0]["bulleted_list_item"]
+    c = b["children"][0]["bulleted_list_item"]
+    assert c["children"][0]["bulleted_list_item"]["rich_text"][0]["text"]["content"] == "d"
+
+    # Large nested payloads are split by their total block count
+    monkeypatch.setattr(notion_api, "APPEND_MAX_BLOCKS", 4)
+    client.client.blocks = _FakeBlocks()
+    client.append_page_content("page", "- a\n  - a1\n  - a2\n- b\n  - b1")
+    assert client.client.blocks.children.append_calls == [
+        ("page", ["bulleted_list_item"]),
+        ("page", ["bulleted_list_item"]),
+    ]
+
+
+def test_clear_page_content_deletes_blocks_concurrently():
+    import threading
+
+    existing = [{"id": "p1", "type": "child_page"}] + [{"id": f"b{i}", "type": "paragraph"} for i in range(10)]
+    deleted = []
+    lock = threading.Lock()
+
+    class _Blocks:
+        class children:
+            @staticmethod
+            def list(block_id, start_cursor=None, page_size=100):
+                return {"results": existing, "has_more": False}
+
+        @staticmethod
+        def delete(block_id):
+            with lock:
+                deleted.append(block_id)
+
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.blocks = _Blocks()
+
+    assert client.clear_page_content("page") == 1
+    assert sorted(deleted) == sorted(f"b{i}" for i in range(10))
+    # The remaining children are known without listing the page again
+    existing.clear()
+    assert client.list_children("page") == [{"id": "p1", "type": "child_page"}]
+
+
+def test_prefix_lookup_keeps_page_order_after_clear_and_create(monkeypatch):
+    existing = [
+        {"id": "b1", "type": "paragraph"},
+        {"id": "b2", "type": "paragraph"},
+        {"id": "A", "type": "child_page", "child_page": {"title": "Foo Alpha"}},
+    ]
+
+    class _Blocks:
+        class children:
+            @staticmethod
+            def list(block_id, start_cursor=None, page_size=100):
+                return {"results": existing, "has_more": False}
+
+        @staticmethod
+        def delete(block_id):
+            pass
+
+    class _Pages(_FakePages):
+        def create(self, **kwargs):
+            return {"id": "B"}
+
+    client = NotionClient("secret", titles_matching="prefix")
+    client.client = _FakeClient()
+    client.client.blocks = _Blocks()
+    client.client.pages = _Pages()
+    monkeypatch.setattr(client, "_detect_parent_type", lambda parent_id: "page")
+
+    assert client.find_child_page("page", "Foo") == "A"
+    client.clear_page_content("page")
+    client.create_child_page("page", "Foo Beta")
+    assert client.find_child_page("page", "Foo") == "A"
+    assert client.find_child_page("page", "Foo B") == "B"
+
+
+def test_sdk_requests_are_retried_when_rate_limited(monkeypatch):
+    import httpx
+
+    from notion_docs import notion_api
+
+    sleeps = []
+    monkeypatch.setattr(notion_api.time, "sleep", sleeps.append)
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0.5"}, json={"object": "error", "code": "rate_limited", "message": "slow down"}),
+        httpx.Response(429, json={"object": "error", "code": "rate_limited", "message": "slow down"}),
+        httpx.Response(200, json={"object": "block", "id": "b1"}),
+    ]
+    client = notion_api._RateLimitedClient(
+        auth="secret", client=httpx.Client(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    )
+
+    assert client.blocks.delete(block_id="b1") == {"object": "block", "id": "b1"}
+    assert sleeps == [0.5, 2]
+
+
+def test_children_listing_is_cached_until_page_changes(monkeypatch):
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    monkeypatch.setattr(client, "_detect_parent_type", lambda parent_id: "page")
+    list_calls = []
+
+    class _Blocks:
+        class children:
+            @staticmethod
+            def list(block_id, start_cursor=None, page_size=100):
+                list_calls.append(block_id)
+                return {"results": [{"id": "c1", "type": "child_page", "child_page": {"title": "Alpha"}}], "has_more": False}
+
+    class _Pages(_FakePages):
+        def create(self, **kwargs):
+            return {"id": "new"}
+
+    client.client.blocks = _Blocks()
+    client.client.pages = _Pages()
+
+    assert client.find_child_page("page", "alpha") == "c1"
+    assert client.find_child_page("page", "beta") is None
+    assert list_calls == ["page"]
+
+    # Pages created by the client are added to the cached listing instead of listing again
+    assert client.create_child_page("page", "Beta") == "new"
+    assert client.find_child_page("page", "beta") == "new"
+    assert list_calls == ["page"]
+
+
+def test_find_child_page_by_mnemonic_uses_first_match(monkeypatch):
+    client = NotionClient("secret", titles_matching="mnemonic")
+    client.client = _FakeClient()
+    monkeypatch.setattr(client, "_detect_parent_type", lambda parent_id: "page")
+    children = [
+        {"id": "p0", "type": "paragraph"},
+        {"id": "c1", "type": "child_page", "child_page": {"title": "Payment Service"}},
+        {"id": "c2", "type": "child_page", "child_page": {"title": "Paym"}},
+    ]
+    monkeypatch.setattr(client, "list_children", lambda parent_id: children)
+
+    assert client.find_child_page("page", "pym") == "c1"
+    assert client.find_child_page("page", "Payment Service") is None
+
+
+def test_find_child_page_by_prefix_uses_first_match_in_page_order(monkeypatch):
+    client = NotionClient("secret", titles_matching="prefix")
+    client.client = _FakeClient()
+    monkeypatch.setattr(client, "_detect_parent_type", lambda parent_id: "page")
+    children = [
+        {"id": "c1", "type": "child_page", "child_page": {"title": "API"}},
+        {"id": "c2", "type": "child_page", "child_page": {"title": "API-2 Zeta"}},
+        {"id": "c3", "type": "child_page", "child_page": {"title": "API-1 Alpha"}},
+    ]
+    monkeypatch.setattr(client, "list_children", lambda parent_id: children)
+
+    assert client.find_child_page("page", "api") == "c2"
+    assert client.find_child_page("page", "API-1") == "c3"
+    assert client.find_child_page("page", "API") == "c2"
+    assert client.find_child_page("page", "api-3") is None
+    assert client.find_child_page("page", "") is None
+
+
+def test_get_metadata_reuses_page_fetched_for_type_detection():
+    def rich(text):
+        return {"type": "rich_text", "rich_text": [{"type": "text", "text": {"content": text}}]}
+
+    class _Pages(_FakePages):
+        def __init__(self):
+            super().__init__()
+            self.retrieve_calls = 0
+
+        def retrieve(self, page_id):
+            self.retrieve_calls += 1
+            return {"id": page_id, "properties": {"Text Hash": rich("t1"), "Subtree Hash": rich("s1")}}
+
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.pages = _Pages()
+
+    assert client.get_metadata("page") == ("t1", "s1")
+    assert client.client.pages.retrieve_calls == 1
+
+    client.set_metadata("page", "t2", "s2")
+    client.get_metadata("page")
+    assert client.client.pages.retrieve_calls == 2
+
+
+def test_database_lookups_retrieve_database_once():
+    class _Databases:
+        def __init__(self):
+            self.retrieve_calls = 0
+
+        def retrieve(self, database_id):
+            self.retrieve_calls += 1
+            return {"id": database_id, "properties": {"Name": {"type": "title"}}, "data_sources": [{"id": "ds"}]}
+
+    class _DataSources:
+        def query(self, data_source_id, filter, page_size):
+            title = filter["title"]["equals"]
+            return {"results": [{"id": f"id-{title}", "properties": {"Name": {"type": "title", "title": [{"plain_text": title}]}}}]}
+
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.databases = _Databases()
+    client.client.data_sources = _DataSources()
+
+    assert client.find_child_page("db", "Alpha") == "id-Alpha"
+    assert client.find_child_page("db", "Beta") == "id-Beta"
+    assert client.client.databases.retrieve_calls == 1
+
+
+def test_prefetched_pages_serve_type_detection_and_metadata():
+    class _Pages(_FakePages):
+        def __init__(self):
+            super().__init__()
+            self.retrieved = []
+
+        def retrieve(self, page_id):
+            self.retrieved.append(page_id)
+            return {"id": page_id, "properties": {}}
+
+    client = NotionClient("secret")
+    client.client = _FakeClient()
+    client.client.pages = _Pages()
+
+    client.prefetch_pages(["a", "b", "c"])
+    assert sorted(client.client.pages.retrieved) == ["a", "b", "c"]
+
+    for page_id in ("a", "b", "c"):
+        assert client.get_metadata(page_id) == (None, None)
+    assert len(client.client.pages.retrieved) == 3
@@ -5,6 +5,10 @@ import pytest
 from notion_docs.files import extract_block_comments_from_file
 
 
+def fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def write(p: Path, content: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(content, encoding="utf-8")
@@ -41,7 +45,7 @@ def test_notion_star_uses_previous_breadcrumb(tmp_path, caplog):
 
     # Ensure text_hashes are correct
     for c in a_comments:
-        assert c.text_hash == hashlib.sha256(c.text.encode("utf-8")).hexdigest()
+        assert c.text_hash == fingerprint(c.text)
 
     # No error should be logged in this valid case
     assert not [rec for rec in caplog.records if rec.levelname == "ERROR"]
@@ -0,0 +1,31 @@
+from notion_docs.markdown_to_notion import StreamingMarkdownConverter, markdown_to_blocks
+
+
+def test_streamed_chunks_match_whole_conversion():
+    """Test that feeding text in small chunks yields the same blocks as one conversion"""
+    markdown = (
+        "# Title\r\n\r\nFirst paragraph\nwith a soft break.\n\n"
+        "- item\n  - nested\n- other\n\n"
+        "> quoted\n> text\n\n"
+        "```kotlin\nval x = 1\n\nval y = 2\n```\n\n"
+        "| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+        "[ref]: https://example.com\n\nSee [the docs][ref].\n"
+    )
+    conv = StreamingMarkdownConverter(quote_color="gray", inline_code_color="red")
+    streamed = []
+    for i in range(0, len(markdown), 5):
+        streamed.extend(conv.feed(markdown[i:i + 5]))
+    streamed.extend(conv.close())
+
+    assert streamed == markdown_to_blocks(markdown, quote_color="gray", inline_code_color="red")
+
+
+def test_blocks_are_emitted_once_complete():
+    """Test that a block is only returned after the next block has started"""
+    conv = StreamingMarkdownConverter()
+    assert conv.feed("Title\n") == []
+    # An underline turns the pending paragraph into a heading, so nothing was final yet
+    blocks = conv.feed("===\n\nBody")
+    assert [b["type"] for b in blocks] == ["heading_1"]
+    assert blocks[0]["heading_1"]["rich_text"][0]["text"]["content"] == "Title"
+    assert [b["type"] for b in conv.close()] == ["paragraph"]
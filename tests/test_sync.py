@@ -0,0 +1,131 @@
+import hashlib
+
+from notion_docs.models import BlockComment
+from notion_docs import sync
+from notion_docs.sync import _aggregate_comments
+
+
+def _sha(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def _subtree(s: str) -> str:
+    # Stored subtree hashes carry the version of their computation
+    return "v2:" + _sha(s)
+
+
+def test_subtree_hash_combines_direct_children():
+    comments = [
+        BlockComment("a.kt", "a", ["A"]),
+        BlockComment("b.kt", "ab", ["A", "B"]),
+        BlockComment("c.kt", "abc", ["A", "B", "C"]),
+        BlockComment("d.kt", "ad", ["A", "D"]),
+        BlockComment("e.kt", "x", ["AB"]),
+    ]
+    pages = _aggregate_comments(comments)
+
+    leaf = _subtree("")
+    assert pages[("A", "B", "C")].subtree_hash == leaf
+    assert pages[("A", "B")].subtree_hash == _subtree(_sha("abc") + leaf + "\n")
+    assert pages[("A",)].subtree_hash == _subtree(
+        _sha("ab") + pages[("A", "B")].subtree_hash + "\n" + _sha("ad") + leaf + "\n"
+    )
+    # Siblings sharing a name prefix are not descendants
+    assert pages[("AB",)].subtree_hash == leaf
+
+
+def test_subtree_hash_changes_only_for_ancestors_of_a_change():
+    comments = [
+        BlockComment("a.kt", "a", ["A"]),
+        BlockComment("b.kt", "ab", ["A", "B"]),
+        BlockComment("c.kt", "abc", ["A", "B", "C"]),
+    ]
+    before = _aggregate_comments(comments)
+    comments[2] = BlockComment("c.kt", "changed", ["A", "B", "C"])
+    after = _aggregate_comments(comments)
+
+    assert after[("A",)].subtree_hash != before[("A",)].subtree_hash
+    assert after[("A", "B")].subtree_hash != before[("A", "B")].subtree_hash
+    assert after[("A", "B", "C")].subtree_hash == before[("A", "B", "C")].subtree_hash
+
+
+def test_large_texts_hashed_in_parallel_match_inline_hashes(monkeypatch):
+    comments = [BlockComment(f"{i}.kt", f"text {i} " * 50, ["A", str(i)]) for i in range(6)]
+    expected = {crumb: (p.text_hash, p.subtree_hash) for crumb, p in _aggregate_comments(comments).items()}
+
+    monkeypatch.setattr(sync, "PARALLEL_HASH_MIN_CHARS", 100)
+    monkeypatch.setattr(sync, "HASH_WORKERS", 3)
+    pages = _aggregate_comments(comments)
+    assert {crumb: (p.text_hash, p.subtree_hash) for crumb, p in pages.items()} == expected
+    assert pages[("A", "0")].text_hash == _sha("text 0 " * 50)
+
+
+class _FakeNotion:
+    """Minimal page tree standing in for NotionClient during a sync."""
+
+    def __init__(self, *args, **kwargs):
+        self.children = {"root": []}
+        self.titles = {}
+        self.meta = {}
+        self.content = {}
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def find_child_page(self, parent_id, title):
+        return next((c for c in self.children[parent_id] if self.titles[c] == title), None)
+
+    def create_child_page(self, parent_id, title):
+        page_id = f"p{len(self.titles)}"
+        self.children[parent_id].append(page_id)
+        self.children[page_id] = []
+        self.titles[page_id] = title
+        return page_id
+
+    def get_metadata(self, page_id):
+        return self.meta.get(page_id, (None, None))
+
+    def set_metadata(self, page_id, text_hash, subtree_hash, ignore_errors=False):
+        self.meta[page_id] = (text_hash, subtree_hash)
+
+    def clear_page_content(self, page_id):
+        self.content.pop(page_id, None)
+        return len(self.children[page_id])
+
+    def append_page_content(self, page_id, text, source_files, has_children=False):
+        self.content[page_id] = text
+
+    def prefetch_pages(self, page_ids):
+        pass
+
+    def content_of(self, *titles):
+        page_id = "root"
+        for title in titles:
+            page_id = self.find_child_page(page_id, title)
+        return self.content.get(page_id)
+
+
+def test_metadata_cache_does_not_skip_recreated_pages(tmp_path, monkeypatch):
+    notion = _FakeNotion()
+    monkeypatch.setattr(sync, "NotionClient", notion)
+
+    class _Config:
+        api_key = "secret"
+        root_page_id = "root"
+        metadata_cache = str(tmp_path / "cache.json")
+
+    comments = [
+        BlockComment("a.kt", "a", ["A"]),
+        BlockComment("b.kt", "ab", ["A", "B"]),
+        BlockComment("c.kt", "c", ["C"]),
+    ]
+    sync.sync_to_notion(_Config(), comments)
+    assert notion.content_of("A", "B") == "ab"
+
+    # Someone deletes A (and with it A / B) in Notion; the next sync is triggered by a change to C
+    notion.children["root"] = [c for c in notion.children["root"] if notion.titles[c] != "A"]
+    comments[2] = BlockComment("c.kt", "c2", ["C"])
+    sync.sync_to_notion(_Config(), comments)
+    assert notion.content_of("A") == "a"
+    assert notion.content_of("A", "B") == "ab"
+    assert notion.content_of("C") == "c2"